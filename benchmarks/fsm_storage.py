@@ -0,0 +1,112 @@
+"""
+Сравнение сериализации данных FSM: JSON, как было в RedisStorage, и
+msgpack из MsgpackRedisStorage.
+
+    uv run python benchmarks/fsm_storage.py
+    uv run python benchmarks/fsm_storage.py --redis redis://localhost:6379/15
+
+С --redis дополнительно пишет payload'ы в указанную базу и сравнивает
+MEMORY USAGE ключей; ключи удаляются после замера.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import msgpack
+import msgspec
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.fsm_storage import MsgpackRedisStorage  # noqa: E402
+
+# Типичные данные состояний бота
+PAYLOADS: dict[str, dict[str, Any]] = {
+    "menu": {"message_id": 48213},
+    "page": {"message_id": 48213, "channels_ids": list(range(1000, 1010))},
+    "login": {
+        "message_id": 48213,
+        "api_id": "21724019",
+        "api_hash": "0b5f4c1b0d6e6a7d91a9c0f3e8d2b4a1",
+        "phone": "+79991234567",
+        "code": "12345",
+        "is_password": True,
+    },
+    "big_page": {
+        "message_id": 48213,
+        "triggers_ids": list(range(100_000, 100_200)),
+        "ignores_ids": list(range(200_000, 200_200)),
+    },
+}
+
+_json_dumps = partial(lambda obj: str(msgspec.json.encode(obj), encoding="utf-8"))
+
+# Название -> (encode, decode); decode получает то, что вернул бы Redis
+CODECS: dict[str, tuple[Callable[[Any], Any], Callable[[bytes], Any]]] = {
+    "json (stdlib)": (json.dumps, lambda raw: json.loads(raw.decode("utf-8"))),
+    "msgspec json -> str (было)": (
+        _json_dumps,
+        lambda raw: msgspec.json.decode(raw.decode("utf-8")),
+    ),
+    "msgpack": (msgpack.packb, msgpack.unpackb),
+    "msgspec msgpack (стало)": (
+        MsgpackRedisStorage.encode_data,
+        MsgpackRedisStorage.decode_data,
+    ),
+}
+
+
+def _as_bytes(value: bytes | str) -> bytes:
+    return value if isinstance(value, bytes) else value.encode("utf-8")
+
+
+def bench_codecs(number: int) -> None:
+    print(f"{'payload':<10} {'codec':<28} {'size':>6} {'enc, us':>9} {'dec, us':>9}")
+    for name, payload in PAYLOADS.items():
+        for codec, (encode, decode) in CODECS.items():
+            raw = _as_bytes(encode(payload))
+            assert decode(raw) == payload
+            enc = timeit.timeit(lambda: encode(payload), number=number)
+            dec = timeit.timeit(lambda: decode(raw), number=number)
+            print(
+                f"{name:<10} {codec:<28} {len(raw):>6} "
+                f"{enc / number * 1e6:>9.2f} {dec / number * 1e6:>9.2f}"
+            )
+        print()
+
+
+def bench_redis(url: str) -> None:
+    from redis import Redis
+
+    redis = Redis.from_url(url)
+    print(f"{'payload':<10} {'codec':<28} {'memory, B':>10}")
+    try:
+        for name, payload in PAYLOADS.items():
+            for codec, (encode, _) in CODECS.items():
+                key = f"post_manager:benchmark:fsm:{name}:{codec}"
+                redis.set(key, encode(payload))
+                print(f"{name:<10} {codec:<28} {redis.memory_usage(key):>10}")
+                redis.delete(key)
+            print()
+    finally:
+        redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--redis", help="redis://… для замера MEMORY USAGE")
+    args = parser.parse_args()
+
+    bench_codecs(args.number)
+    if args.redis:
+        bench_redis(args.redis)
+
+
+if __name__ == "__main__":
+    main()
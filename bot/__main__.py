@@ -5,7 +5,6 @@ import logging
 from asyncio import CancelledError
 from functools import partial
 
-import msgspec
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.client.session.aiohttp import AiohttpSession
@@ -13,25 +12,35 @@ from aiogram.client.telegram import PRODUCTION
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.base import DefaultKeyBuilder
 from aiogram.fsm.storage.memory import SimpleEventIsolation
-from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.types import BotCommand
 from dotenv import load_dotenv
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot import handlers
 from bot.background_jobs import send_posts
-from bot.db.base import close_db, create_db_session_pool, init_db
+from bot.catcher_runtime import catchers
+from bot.catcher_runtime import runtime as catcher_runtime
+from bot.catcher_status import registry as catcher_registry
+from bot.db.base import DBRouter, close_db, create_db_router, init_db
+from bot.db.partitions import maintain_posts_partitions
+from bot.fsm_storage import MsgpackRedisStorage
+from bot.join_queue import REBALANCE_TAG, join_queue, rebalance_and_enqueue
+from bot.login_clients import login_clients
+from bot.middlewares.cached_fsm import CachedFSMContextMiddleware
 from bot.middlewares.throw_session import ThrowDBSessionMiddleware
 from bot.middlewares.throw_user_model import ThrowUserMiddleware
 from bot.middlewares.wall_sub import WallSubMiddleware
+from bot.resolver import resolver
+from bot.scheduler import RedisJobStore
 from bot.scheduler import default_scheduler as scheduler
 from bot.scheduler import logger as scheduler_logger
 from bot.settings import Settings, se
+from bot.supervisor import start_connected_catchers, supervisor
+from bot.utils.page_cache import PageCache
 
 load_dotenv()
 
-scheduler_logger.setLevel(logging.ERROR)
+scheduler_logger.setLevel(logging.WARNING)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,40 +48,83 @@ logger.setLevel(logging.INFO)
 
 
 async def start_scheduler(
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
     redis: Redis,
     bot: Bot,
+    page_cache: PageCache,
 ) -> None:
-    scheduler.every(2).seconds.do(
+    # Общее состояние и блокировки задач, чтобы несколько реплик бота
+    # не выполняли одну и ту же задачу
+    scheduler.store = RedisJobStore(redis)
+    scheduler.every(2).seconds.timeout(5 * 60).do(
         send_posts,
-        sessionmaker=sessionmaker,
+        db_router=db_router,
         redis=redis,
         bot=bot,
     )
-    while True:
-        await scheduler.run_pending()
-        await asyncio.sleep(1)
+    partitions = (
+        scheduler.every(1)
+        .hours.misfire_grace_time(10 * 60)
+        .timeout(30 * 60)
+        .do(maintain_posts_partitions, db_router=db_router, se=se)
+    )
+    scheduler.every(1).minutes.timeout(5 * 60).tag(REBALANCE_TAG).do(
+        rebalance_and_enqueue, db_router=db_router, redis=redis
+    )
+    scheduler.every(1).minutes.timeout(5 * 60).do(
+        resolver.resolve_channels,
+        db_router=db_router,
+        redis=redis,
+        page_cache=page_cache,
+    )
+    # Партиции нужны сразу после старта; через run_once, чтобы реплики,
+    # запущенные одновременно, не делали ALTER TABLE параллельно
+    try:
+        await scheduler.run_once(partitions)
+    except Exception:
+        logger.exception("Initial posts partitions maintenance failed")
+    await scheduler.run_forever()
 
 
 async def startup(dispatcher: Dispatcher, bot: Bot, se: Settings, redis: Redis) -> None:
     await bot.delete_webhook(drop_pending_updates=True)
 
-    engine, db_session = await create_db_session_pool(se)
-    await init_db(engine)
+    db_router = await create_db_router(se)
+    await init_db(db_router.primary)
+    page_cache = PageCache(redis)
 
     dispatcher.workflow_data.update(
-        {"sessionmaker": db_session, "db_session_closer": partial(close_db, engine)}
+        {
+            "sessionmaker": db_router.writer,
+            "db_router": db_router,
+            "db_session_closer": partial(close_db, db_router),
+            "pool_stats": db_router.pool_stats["primary"],
+            "redis": redis,
+            "page_cache": page_cache,
+        }
     )
 
     dispatcher.update.outer_middleware(ThrowDBSessionMiddleware())
     dispatcher.update.outer_middleware(ThrowUserMiddleware())
     dispatcher.update.outer_middleware(WallSubMiddleware())
 
+    login_clients.start()
+    supervisor.bind(redis)
+    supervisor.subscribe(catcher_registry.on_status)
+    catcher_runtime.subscribe(catcher_registry.on_status)
+    if se.catcher_mode == "inprocess":
+        catcher_runtime.bind(db_router, redis)
+        join_queue.start(redis)
+    await start_connected_catchers(db_router, catchers)
+    await catcher_registry.refresh(db_router, redis)
+    catcher_registry.start(db_router, redis)
+
     asyncio.create_task(
         start_scheduler(
-            sessionmaker=db_session,
+            db_router=db_router,
             redis=redis,
             bot=bot,
+            page_cache=page_cache,
         )
     )
 
@@ -80,7 +132,15 @@ async def startup(dispatcher: Dispatcher, bot: Bot, se: Settings, redis: Redis)
 
 
 async def shutdown(dispatcher: Dispatcher) -> None:
+    # Иначе цикл статусов успеет записать is_connected=False остановленным ловцам
+    catcher_registry.stop()
+    await supervisor.stop_all()
+    join_queue.stop()
+    await catcher_runtime.stop_all()
+    await login_clients.close_all()
     await dispatcher["db_session_closer"]()
+    # Пул FSM закрывает сам dispatcher через storage.close
+    await dispatcher["redis"].aclose(close_connection_pool=True)
     logger.info("Bot stopped")
 
 
@@ -101,17 +161,25 @@ async def main() -> None:
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
     redis = await se.redis_dsn()
-    storage = RedisStorage(
-        redis=redis,
+    storage = MsgpackRedisStorage(
+        redis=await se.redis_dsn(se.redis.fsm_max_connections),
         key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
-        json_loads=msgspec.json.decode,
-        json_dumps=partial(lambda obj: str(msgspec.json.encode(obj), encoding="utf-8")),
     )
 
     dp = Dispatcher(
         storage=storage,
         events_isolation=SimpleEventIsolation(),
+        disable_fsm=True,
+    )
+    # FSM с одним чтением и одной записью в Redis за апдейт вместо
+    # стандартного FSMContextMiddleware; встаёт на его место — сразу после
+    # UserContextMiddleware
+    dp.fsm = CachedFSMContextMiddleware(
+        storage=dp.fsm.storage,
+        events_isolation=dp.fsm.events_isolation,
+        strategy=dp.fsm.strategy,
     )
+    dp.update.outer_middleware(dp.fsm)
 
     dp.include_routers(handlers.router)
     dp.startup.register(partial(startup, se=se, redis=redis))
@@ -5,14 +5,18 @@ from typing import Final
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import delete, select
+from sqlalchemy.orm import selectinload
 
+from bot.db.base import DBRouter
 from bot.db.models import Post, UserDB
 from bot.utils import fn
 
 logger = logging.getLogger(__name__)
 minute: Final[int] = 60
+# Запас назад от created_at последнего поста: в MySQL выборка по id затрагивает
+# только партиции за эти дни
+posts_lookback: Final[datetime.timedelta] = datetime.timedelta(days=1)
 
 
 def key_build(key: str) -> str:
@@ -20,36 +24,52 @@ def key_build(key: str) -> str:
 
 
 key_last_post_id = key_build("last_post_id")
+key_last_post_created_at = key_build("last_post_created_at")
 
 
 async def send_posts(
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
     redis: Redis,
     bot: Bot,
 ) -> None:
-    last_post_id = await redis.get(key_last_post_id)
+    last_post_id, last_post_created_at = await redis.mget(
+        key_last_post_id, key_last_post_created_at
+    )
 
-    async with sessionmaker() as session:
+    async with db_router.background_reader() as read_session:
         if last_post_id:
             last_post_id = int(last_post_id)
-            posts = (
-                await session.scalars(select(Post).where(Post.id > last_post_id))
-            ).all()
+            stmt = select(Post).where(Post.id > last_post_id).order_by(Post.id)
+            if last_post_created_at:
+                since = datetime.datetime.fromisoformat(last_post_created_at.decode())
+                stmt = stmt.where(Post.created_at >= since - posts_lookback)
+            posts = (await read_session.scalars(stmt)).all()
         else:
-            posts = (await session.scalars(select(Post))).all()
+            posts = (await read_session.scalars(select(Post).order_by(Post.id))).all()
             logger.info(posts)
 
-        if not posts:
-            return
-        await redis.set(key_last_post_id, posts[-1].id)
+    if not posts:
+        return
+    await redis.mset(
+        {
+            key_last_post_id: posts[-1].id,
+            key_last_post_created_at: max(p.created_at for p in posts).isoformat(),
+        }
+    )
 
-        users = await session.scalars(
-            select(UserDB).where(UserDB.receive_notifications.is_(True))
-        )
+    async with db_router.background() as session:
+        users = (
+            await session.scalars(
+                select(UserDB)
+                .where(UserDB.receive_notifications.is_(True))
+                .options(selectinload(UserDB.triggers), selectinload(UserDB.ignores))
+            )
+        ).all()
         if not users:
             logger.info("no users")
             return
 
+        useless_posts_ids = []
         for post in posts:
             useless = True
 
@@ -97,8 +117,10 @@ async def send_posts(
                 useless = False
 
             if useless:
-                await session.delete(post)
+                useless_posts_ids.append(post.id)
 
+        if useless_posts_ids:
+            await session.execute(delete(Post).where(Post.id.in_(useless_posts_ids)))
         await session.commit()
 
 
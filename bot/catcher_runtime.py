@@ -0,0 +1,225 @@
+import asyncio
+import dataclasses
+import logging
+import os
+import time
+from functools import partial
+
+from redis.asyncio import Redis
+from telethon import TelegramClient, events
+
+from bot.db.base import DBRouter
+from bot.heartbeat import (
+    HEARTBEAT_INTERVAL,
+    CatcherHeartbeat,
+    delete_heartbeat,
+    write_heartbeats,
+)
+from bot.ingest import PostWriter
+from bot.settings import se
+from bot.supervisor import (
+    CatcherSpec,
+    CatcherStatus,
+    CatcherSupervisor,
+    StatusListener,
+    supervisor,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class CatcherClient:
+    spec: CatcherSpec
+    client: TelegramClient
+    heartbeat: CatcherHeartbeat
+    task: asyncio.Task | None = None
+    stopping: bool = False
+
+
+class CatcherRuntime:
+    """
+    Ловцы как клиенты Telethon внутри процесса бота: общий event loop, пул БД
+    и Redis вместо отдельного интерпретатора на каждый аккаунт.
+
+    Интерфейс start/stop/is_running совпадает с CatcherSupervisor, чтобы
+    админка работала с любым режимом (настройка CATCHER_MODE).
+    """
+
+    def __init__(
+        self,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        stable_after: float = 60,
+    ) -> None:
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.db_router: DBRouter | None = None
+        self.redis: Redis | None = None
+        self.post_writer: PostWriter | None = None
+        self._clients: dict[str, CatcherClient] = {}
+        self._listeners: list[StatusListener] = []
+        self._heartbeat_task: asyncio.Task | None = None
+        # Как у супервизора: остановка при выключении бота не отключает ловцов
+        self.shutting_down = False
+
+    def bind(self, db_router: DBRouter, redis: Redis) -> None:
+        self.db_router = db_router
+        self.redis = redis
+        if self.post_writer is None:
+            self.post_writer = PostWriter(
+                db_router, se.posts_flush_size, se.posts_flush_interval
+            )
+            self.post_writer.start()
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    def subscribe(self, listener: StatusListener) -> None:
+        self._listeners.append(listener)
+
+    def get(self, phone: str) -> CatcherClient | None:
+        return self._clients.get(phone)
+
+    def running(self) -> list[CatcherClient]:
+        return [c for phone, c in self._clients.items() if self.is_running(phone)]
+
+    def is_running(self, phone: str) -> bool:
+        catcher = self._clients.get(phone)
+        return catcher is not None and catcher.client.is_connected()
+
+    async def start(self, spec: CatcherSpec) -> int:
+        """Подключает клиента и возвращает PID процесса бота, либо -1."""
+        if self.is_running(spec.phone):
+            return os.getpid()
+        await self.stop(spec.phone)
+
+        client = TelegramClient(spec.path_session, spec.api_id, spec.api_hash)
+        try:
+            await client.connect()
+            if not await client.is_user_authorized():
+                logger.error("Catcher %s session is not authorized", spec.phone)
+                await client.disconnect()
+                return -1
+        except Exception:
+            logger.exception("Failed to connect catcher %s", spec.phone)
+            await client.disconnect()
+            return -1
+
+        catcher = CatcherClient(spec, client, CatcherHeartbeat(spec.phone))
+        client.add_event_handler(
+            partial(self._on_message, catcher), events.NewMessage(incoming=True)
+        )
+        self._clients[spec.phone] = catcher
+        catcher.task = asyncio.create_task(self._run(catcher))
+        # Первый heartbeat сразу, не дожидаясь цикла: по нему админка видит ловца
+        await write_heartbeats(self.redis, [catcher.heartbeat])
+        await self._notify(spec.phone, CatcherStatus.RUNNING)
+        logger.info("Catcher %s started in-process", spec.phone)
+        return os.getpid()
+
+    async def wait_started(self, phone: str) -> bool:
+        # Авторизация проверяется в start, ждать падения процесса не нужно
+        return self.is_running(phone)
+
+    async def stop(self, phone: str) -> None:
+        catcher = self._clients.pop(phone, None)
+        if catcher is None:
+            return
+        catcher.stopping = True
+        await catcher.client.disconnect()
+        if catcher.task is not None:
+            catcher.task.cancel()
+        if self.redis is not None:
+            await delete_heartbeat(self.redis, phone)
+        await self._notify(phone, CatcherStatus.STOPPED)
+
+    async def stop_all(self) -> None:
+        self.shutting_down = True
+        await asyncio.gather(*(self.stop(phone) for phone in list(self._clients)))
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self.post_writer is not None:
+            await self.post_writer.close()
+
+    async def _run(self, catcher: CatcherClient) -> None:
+        client = catcher.client
+        try:
+            catcher.heartbeat.channels = await _count_channels(client)
+        except Exception:
+            logger.exception("Failed to count channels of %s", catcher.spec.phone)
+
+        backoff = self.min_backoff
+        while True:
+            started_at = time.monotonic()
+            try:
+                if not client.is_connected():
+                    await client.connect()
+                await client.run_until_disconnected()
+            except Exception:
+                catcher.heartbeat.errors += 1
+                logger.exception("Catcher %s disconnected", catcher.spec.phone)
+            if catcher.stopping:
+                return
+            # Telethon сам переподключается при сбоях сети; сюда попадаем,
+            # только если клиент окончательно отвалился
+            if time.monotonic() - started_at >= self.stable_after:
+                backoff = self.min_backoff
+            await self._notify(catcher.spec.phone, CatcherStatus.BACKOFF)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            await self._notify(catcher.spec.phone, CatcherStatus.RUNNING)
+
+    async def _on_message(
+        self, catcher: CatcherClient, event: events.NewMessage.Event
+    ) -> None:
+        if not event.is_channel or event.is_group or not event.raw_text:
+            return
+        chat = await event.get_chat()
+        # Для приватных каналов ссылка на пост строится как t.me/c/<id>/<msg>
+        username = chat.username or f"c/{chat.id}"
+        self.post_writer.add(username, event.id, event.raw_text, event.date)
+
+        heartbeat = catcher.heartbeat
+        heartbeat.posts += 1
+        heartbeat.last_post_at = event.date.timestamp()
+        heartbeat.last_message_id = event.id
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            now = time.time()
+            heartbeats = []
+            for phone in list(self._clients):
+                if self.is_running(phone):
+                    heartbeat = self._clients[phone].heartbeat
+                    heartbeat.sent_at = now
+                    heartbeats.append(heartbeat)
+            try:
+                await write_heartbeats(self.redis, heartbeats)
+            except Exception:
+                logger.exception("Failed to write catcher heartbeats")
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _notify(self, phone: str, status: CatcherStatus) -> None:
+        for listener in self._listeners:
+            try:
+                await listener(phone, status)
+            except Exception:
+                logger.exception("Catcher status listener failed")
+
+
+async def _count_channels(client: TelegramClient) -> int:
+    count = 0
+    async for dialog in client.iter_dialogs():
+        if dialog.is_channel and not dialog.is_group:
+            count += 1
+    return count
+
+
+runtime = CatcherRuntime()
+
+# Через что админка запускает и останавливает ловцов
+catchers: CatcherRuntime | CatcherSupervisor = (
+    runtime if se.catcher_mode == "inprocess" else supervisor
+)
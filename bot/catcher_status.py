@@ -0,0 +1,166 @@
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Final
+
+import psutil
+from redis.asyncio import Redis
+from sqlalchemy import case, select, update
+
+from bot.catcher_runtime import CatcherRuntime, runtime
+from bot.db.base import DBRouter
+from bot.db.models import Catcher
+from bot.heartbeat import CatcherHeartbeat, read_heartbeats
+from bot.supervisor import CatcherStatus, CatcherSupervisor, supervisor
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL: Final[float] = 5
+
+
+@dataclasses.dataclass
+class CatcherStatusEntry:
+    """Снимок ловца для админки; атрибуты совпадают с Catcher для клавиатур."""
+
+    id: int
+    phone: str
+    name: str | None
+    is_connected: bool = False
+    pid: int | None = None
+    uptime: float = 0
+    rss: int = 0
+    cpu_percent: float = 0
+    # Есть, пока кто-то пишет heartbeat ловца: встроенный клиент, супервизор
+    # процесса или сам ловец на другой машине через write_heartbeat
+    heartbeat: CatcherHeartbeat | None = None
+
+    def apply_heartbeat(self, heartbeat: CatcherHeartbeat | None) -> None:
+        self.heartbeat = heartbeat
+        self.is_connected = self.pid is not None or heartbeat is not None
+
+
+class CatcherStatusRegistry:
+    """
+    Статусы ловцов в памяти. Фоновый цикл раз в REFRESH_INTERVAL (или сразу
+    после смены состояния в супервизоре) перечитывает список ловцов, снимает
+    метрики локальных процессов, одним MGET читает heartbeat'ы и одним UPDATE
+    пишет изменившиеся is_connected.
+    """
+
+    def __init__(self, supervisor: CatcherSupervisor, runtime: CatcherRuntime) -> None:
+        self.supervisor = supervisor
+        self.runtime = runtime
+        self._entries: dict[int, CatcherStatusEntry] = {}
+        # cpu_percent считается между вызовами на одном объекте Process
+        self._processes: dict[int, psutil.Process] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def all(self) -> list[CatcherStatusEntry]:
+        return sorted(self._entries.values(), key=lambda entry: entry.id)
+
+    def get(self, catcher_id: int) -> CatcherStatusEntry | None:
+        return self._entries.get(catcher_id)
+
+    def forget(self, catcher_id: int) -> None:
+        self._entries.pop(catcher_id, None)
+
+    def apply_heartbeats(self, heartbeats: dict[str, CatcherHeartbeat]) -> None:
+        for entry in self._entries.values():
+            entry.apply_heartbeat(heartbeats.get(entry.phone))
+
+    @property
+    def shutting_down(self) -> bool:
+        return self.supervisor.shutting_down or self.runtime.shutting_down
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def on_status(self, phone: str, status: CatcherStatus) -> None:
+        if self._task is not None:
+            self.wake()
+
+    def _probe(self, entry: CatcherStatusEntry) -> None:
+        proc = self.supervisor.get(entry.phone)
+        if proc is None or not proc.alive:
+            entry.pid, entry.uptime, entry.rss, entry.cpu_percent = None, 0, 0, 0
+            return
+
+        entry.pid = proc.process.pid
+        process = self._processes.get(entry.pid)
+        if process is None:
+            process = self._processes[entry.pid] = psutil.Process(entry.pid)
+        try:
+            with process.oneshot():
+                entry.rss = process.memory_info().rss
+                entry.cpu_percent = process.cpu_percent()
+                entry.uptime = time.time() - process.create_time()
+        except psutil.Error:
+            entry.rss, entry.cpu_percent = 0, 0
+
+    async def refresh(self, db_router: DBRouter, redis: Redis) -> None:
+        async with db_router.background_reader() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        Catcher.id, Catcher.phone, Catcher.name, Catcher.is_connected
+                    )
+                )
+            ).all()
+        heartbeats = await read_heartbeats(redis, [row.phone for row in rows])
+
+        entries: dict[int, CatcherStatusEntry] = {}
+        changed: dict[int, bool] = {}
+        for catcher_id, phone, name, is_connected in rows:
+            entry = self._entries.get(catcher_id) or CatcherStatusEntry(
+                catcher_id, phone, name
+            )
+            entry.phone, entry.name = phone, name
+            self._probe(entry)
+            entry.apply_heartbeat(heartbeats.get(phone))
+            if entry.is_connected != is_connected:
+                changed[catcher_id] = entry.is_connected
+            entries[catcher_id] = entry
+        self._entries = entries
+
+        alive = {entry.pid for entry in entries.values()}
+        for pid in self._processes.keys() - alive:
+            del self._processes[pid]
+
+        # Ловцы, остановленные выключением бота, должны подняться при
+        # следующем запуске через start_connected_catchers
+        if changed and not self.shutting_down:
+            async with db_router.background() as session:
+                await session.execute(
+                    update(Catcher)
+                    .where(Catcher.id.in_(changed))
+                    .values(is_connected=case(changed, value=Catcher.id))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+
+    def start(self, db_router: DBRouter, redis: Redis) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(db_router, redis))
+
+    def stop(self) -> None:
+        """Останавливает цикл до остановки ловцов при выключении бота."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run(self, db_router: DBRouter, redis: Redis) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refresh(db_router, redis)
+            except Exception:
+                logger.exception("Catcher status refresh failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), REFRESH_INTERVAL)
+            except TimeoutError:
+                pass
+
+
+registry = CatcherStatusRegistry(supervisor, runtime)
@@ -0,0 +1,125 @@
+import bisect
+import dataclasses
+import hashlib
+import logging
+from collections import defaultdict
+from collections.abc import Mapping
+
+from sqlalchemy import delete, select, update
+
+from .base import DBRouter
+from .models import Catcher, ChannelAssignment, MonitoringChannel
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    # Встроенный hash() солится на каждый запуск, а кольцо должно совпадать
+    # между перезапусками и репликами
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """
+    Кольцо консистентного хеширования: у ловца столько виртуальных узлов,
+    сколько его capacity. Когда ловец появляется или пропадает, переезжают
+    только каналы, попавшие на его узлы.
+    """
+
+    def __init__(self, capacities: Mapping[int, int]) -> None:
+        points = sorted(
+            (_hash(f"{catcher_id}:{vnode}"), catcher_id)
+            for catcher_id, capacity in capacities.items()
+            for vnode in range(max(capacity, 1))
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [owner for _, owner in points]
+
+    def __bool__(self) -> bool:
+        return bool(self._owners)
+
+    def lookup(self, key: str) -> int:
+        ind = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[ind]
+
+
+@dataclasses.dataclass
+class RebalanceResult:
+    assigned: int = 0
+    moved: int = 0
+    removed: int = 0
+    # Телефон ловца -> каналы, которые ему достались и в которые надо вступить
+    joins: dict[str, list[str]] = dataclasses.field(default_factory=dict)
+
+
+async def rebalance_channels(db_router: DBRouter) -> RebalanceResult:
+    """
+    Распределяет каналы между подключёнными ловцами и пишет в
+    channel_assignments только отличия от текущего распределения.
+
+    Если подключённых ловцов нет, распределение не трогается.
+    """
+    result = RebalanceResult()
+    async with db_router.background() as session:
+        catchers = (
+            await session.execute(
+                select(Catcher.id, Catcher.capacity, Catcher.phone).where(
+                    Catcher.is_connected.is_(True)
+                )
+            )
+        ).all()
+        ring = HashRing({catcher_id: capacity for catcher_id, capacity, _ in catchers})
+        phones = {catcher_id: phone for catcher_id, _, phone in catchers}
+        if not ring:
+            logger.warning("No connected catchers, channel assignments kept")
+            return result
+
+        channels = (
+            await session.execute(
+                select(MonitoringChannel.id, MonitoringChannel.username)
+            )
+        ).all()
+        current = dict(
+            (
+                await session.execute(
+                    select(ChannelAssignment.channel_id, ChannelAssignment.catcher_id)
+                )
+            ).all()
+        )
+
+        new_rows: list[dict[str, int]] = []
+        moves: dict[int, list[int]] = defaultdict(list)
+        for channel_id, username in channels:
+            catcher_id = ring.lookup(username.casefold())
+            owner = current.pop(channel_id, None)
+            if owner == catcher_id:
+                continue
+            if owner is None:
+                new_rows.append({"channel_id": channel_id, "catcher_id": catcher_id})
+            else:
+                moves[catcher_id].append(channel_id)
+            result.joins.setdefault(phones[catcher_id], []).append(username)
+
+        # Что осталось в current — назначения удалённых каналов
+        if current:
+            await session.execute(
+                delete(ChannelAssignment).where(
+                    ChannelAssignment.channel_id.in_(current)
+                )
+            )
+        for catcher_id, channel_ids in moves.items():
+            await session.execute(
+                update(ChannelAssignment)
+                .where(ChannelAssignment.channel_id.in_(channel_ids))
+                .values(catcher_id=catcher_id)
+            )
+        if new_rows:
+            await session.execute(ChannelAssignment.__table__.insert(), new_rows)
+        await session.commit()
+
+    result.assigned = len(new_rows)
+    result.moved = sum(len(ids) for ids in moves.values())
+    result.removed = len(current)
+    if result.assigned or result.moved or result.removed:
+        logger.info("Channel assignments changed: %s", result)
+    return result
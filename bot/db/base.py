@@ -1,5 +1,8 @@
+import dataclasses
+from functools import partial
 from typing import Any
 
+from sqlalchemy import URL, event
 from sqlalchemy.dialects.sqlite import INTEGER
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
@@ -9,6 +12,7 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from bot.settings import Settings
 
 
@@ -32,18 +36,192 @@ class Base(DeclarativeBase, AsyncAttrs):
         return f"<{self.__class__.__name__} {', '.join(cols)}>"
 
 
-async def create_db_session_pool(
-    se: Settings,
-) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
-    engine: AsyncEngine = create_async_engine(
-        url=se.mysql_dsn(),
-        max_overflow=10,
-        pool_size=100,
+@dataclasses.dataclass
+class PoolStats:
+    """Счётчики выдачи соединений из пула и апдейтов, которым нужна была БД."""
+
+    checkouts: int = 0
+    checkins: int = 0
+    peak_in_use: int = 0
+    updates: int = 0
+    # Апдейты, где хендлер обращался к БД; загрузка пользователя не в счёт
+    updates_with_db: int = 0
+
+    @property
+    def in_use(self) -> int:
+        return self.checkouts - self.checkins
+
+    def watch(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *_: Any) -> None:
+        self.checkouts += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, *_: Any) -> None:
+        self.checkins += 1
+
+
+class LazySession:
+    """
+    Прокси над AsyncSession, который создаёт сессию только при первом обращении.
+
+    Апдейты, которые не трогают БД, не открывают сессию вовсе.
+    """
+
+    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        self._sessionmaker = sessionmaker
+        self._session: AsyncSession | None = None
+        self._used = False
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    @property
+    def used(self) -> bool:
+        """Было ли обращение к сессии после последнего forget_usage."""
+        return self._used
+
+    def forget_usage(self) -> None:
+        # Загрузка пользователя в middleware идёт на каждый апдейт и в
+        # статистику обращений хендлеров к БД не входит
+        self._used = False
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._sessionmaker()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        self._used = True
+        return getattr(self._get_session(), name)
+
+    async def release(self) -> None:
+        """
+        Завершает читающую транзакцию и возвращает соединение в пул.
+
+        Загруженные объекты остаются привязанными к сессии (expire_on_commit=False),
+        следующий запрос возьмёт соединение заново.
+        """
+        session = self._session
+        if session is None or not session.in_transaction():
+            return
+        if session.new or session.dirty or session.deleted:
+            return
+        await session.commit()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class DBRouter:
+    """
+    Пулы соединений под разные виды работы.
+
+    primary — запись и интерактивные хендлеры, background — отдельный небольшой
+    пул к основной БД для планировщика, replica — необязательная реплика для
+    чтения. Без реплики чтение идёт в соответствующий пул основной БД.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        background: AsyncEngine,
+        replica: AsyncEngine | None = None,
+    ) -> None:
+        self.engines: dict[str, AsyncEngine] = {
+            "primary": primary,
+            "background": background,
+        }
+        if replica is not None:
+            self.engines["replica"] = replica
+
+        self.pool_stats: dict[str, PoolStats] = {}
+        self._sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
+        for name, engine in self.engines.items():
+            self.pool_stats[name] = PoolStats()
+            self.pool_stats[name].watch(engine)
+            self._sessionmakers[name] = async_sessionmaker(
+                engine, expire_on_commit=False
+            )
+
+    @property
+    def primary(self) -> AsyncEngine:
+        return self.engines["primary"]
+
+    @property
+    def writer(self) -> async_sessionmaker[AsyncSession]:
+        return self._sessionmakers["primary"]
+
+    @property
+    def reader(self) -> async_sessionmaker[AsyncSession]:
+        return self._sessionmakers.get("replica", self.writer)
+
+    @property
+    def background(self) -> async_sessionmaker[AsyncSession]:
+        return self._sessionmakers["background"]
+
+    @property
+    def background_reader(self) -> async_sessionmaker[AsyncSession]:
+        return self._sessionmakers.get("replica", self.background)
+
+    async def close(self) -> None:
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+def _create_engine(url: URL, pool_size: int, max_overflow: int) -> AsyncEngine:
+    kwargs: dict[str, Any] = {}
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite по умолчанию работает без пула, а PRAGMA (mmap, кэш) живут
+        # в соединении — держим соединения открытыми
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    return create_async_engine(
+        url=url,
+        max_overflow=max_overflow,
+        pool_size=pool_size,
         pool_pre_ping=True,
         pool_recycle=900,
+        **kwargs,
     )
 
-    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+def _set_sqlite_pragmas(se: Settings, dbapi_connection: Any, _: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={se.sqlite.synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={se.sqlite.mmap_size}")
+    cursor.execute(f"PRAGMA cache_size={se.sqlite.cache_size}")
+    cursor.execute(f"PRAGMA busy_timeout={se.sqlite.busy_timeout}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+async def create_db_router(se: Settings) -> DBRouter:
+    primary = _create_engine(se.db_dsn(), se.db.pool_size, se.db.max_overflow)
+    background = _create_engine(
+        se.db_dsn(), se.background_pool_size, se.background_max_overflow
+    )
+
+    if se.db_backend == "sqlite":
+        for engine in (primary, background):
+            event.listen(
+                engine.sync_engine, "connect", partial(_set_sqlite_pragmas, se)
+            )
+        return DBRouter(primary=primary, background=background)
+
+    replica = None
+    if se.db_replica is not None:
+        replica = _create_engine(
+            se.mysql_dsn(se.db_replica),
+            se.db_replica.pool_size,
+            se.db_replica.max_overflow,
+        )
+    return DBRouter(primary=primary, background=background, replica=replica)
 
 
 async def init_db(engine: AsyncEngine) -> None:
@@ -52,5 +230,5 @@ async def init_db(engine: AsyncEngine) -> None:
         await conn.run_sync(Base.metadata.create_all)
 
 
-async def close_db(engine: AsyncEngine) -> None:
-    await engine.dispose()
+async def close_db(router: DBRouter) -> None:
+    await router.close()
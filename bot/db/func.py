@@ -1,8 +1,37 @@
-from sqlalchemy import select
+import datetime
+
+from sqlalchemy import Insert, select, text
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
+from .base import Base
 from .models import UserDB
 
 
-async def _get_user_db_model(session: AsyncSession, user_id: int) -> UserDB | None:
-    return await session.scalar(select(UserDB).where(UserDB.user_id == user_id))
+async def _get_user_db_model(
+    session: AsyncSession,
+    user_id: int,
+    *options: ORMOption,
+) -> UserDB | None:
+    return await session.scalar(
+        select(UserDB).where(UserDB.user_id == user_id).options(*options)
+    )
+
+
+async def _db_utc_offset(session: AsyncSession) -> datetime.timedelta:
+    """Насколько часы БД (NOW(), CURDATE()) впереди UTC."""
+    if session.bind.dialect.name == "sqlite":
+        # CURRENT_TIMESTAMP в SQLite всегда в UTC
+        return datetime.timedelta()
+    seconds = await session.scalar(
+        text("SELECT TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW())")
+    )
+    return datetime.timedelta(seconds=int(seconds))
+
+
+def _insert_ignore(session: AsyncSession, model: type[Base]) -> Insert:
+    """INSERT, который молча пропускает строки, нарушающие уникальные ключи."""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return mysql.insert(model).prefix_with("IGNORE")
@@ -1,7 +1,10 @@
 from typing import List
 from sqlalchemy import (
     BigInteger,
+    DateTime,
     String,
+    UniqueConstraint,
+    func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import datetime
@@ -13,10 +16,23 @@ from .base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        UniqueConstraint(
+            "channel_username",
+            "message_id",
+            "created_at",
+            name="uq_posts_channel_username_message_id",
+        ),
+    )
 
     message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     channel_username: Mapped[str] = mapped_column(String(200), nullable=False)
     content: Mapped[str] = mapped_column(String(4096), nullable=False)
+    # В MySQL таблица партиционирована по дням created_at, поэтому первичный ключ
+    # там (id, created_at); для ORM достаточно id, он остаётся уникальным
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now(), index=True
+    )
 
 
 class UserDB(Base):
@@ -37,18 +53,21 @@ class UserDB(Base):
 
     triggers: Mapped[List["Trigger"]] = relationship(
         back_populates="user",
-        lazy="selectin",
+        lazy="raise_on_sql",
         cascade="all, delete-orphan",
     )
     ignores: Mapped[List["Ignore"]] = relationship(
         back_populates="user",
-        lazy="selectin",
+        lazy="raise_on_sql",
         cascade="all, delete-orphan",
     )
 
 
 class Trigger(Base):
     __tablename__ = "triggers"
+    __table_args__ = (
+        UniqueConstraint("user_id", "content", name="uq_triggers_user_id_content"),
+    )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped[UserDB] = relationship(back_populates="triggers")
@@ -58,6 +77,9 @@ class Trigger(Base):
 
 class Ignore(Base):
     __tablename__ = "ignores"
+    __table_args__ = (
+        UniqueConstraint("user_id", "content", name="uq_ignores_user_id_content"),
+    )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped[UserDB] = relationship(back_populates="ignores")
@@ -75,11 +97,34 @@ class Catcher(Base):
     path_session: Mapped[str] = mapped_column(String(100))
 
     is_connected: Mapped[bool] = mapped_column(default=False)
+    # Относительный вес при распределении каналов между ловцами
+    capacity: Mapped[int] = mapped_column(default=100, server_default="100")
 
 
 class MonitoringChannel(Base):
     __tablename__ = "monitoring_channels"
+    __table_args__ = (
+        UniqueConstraint("username", name="uq_monitoring_channels_username"),
+    )
 
     username: Mapped[str] = mapped_column(String(100))
     channel_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    # Вместе с channel_id даёт InputChannel без запроса к Telegram
+    access_hash: Mapped[int] = mapped_column(BigInteger, nullable=True)
     title: Mapped[str] = mapped_column(String(500), nullable=True)
+
+
+class ChannelAssignment(Base):
+    """Какой ловец следит за каналом; заполняет bot.db.assignments."""
+
+    __tablename__ = "channel_assignments"
+    __table_args__ = (
+        UniqueConstraint("channel_id", name="uq_channel_assignments_channel_id"),
+    )
+
+    channel_id: Mapped[int] = mapped_column(
+        ForeignKey("monitoring_channels.id", ondelete="CASCADE")
+    )
+    catcher_id: Mapped[int] = mapped_column(
+        ForeignKey("catchers.id", ondelete="CASCADE"), index=True
+    )
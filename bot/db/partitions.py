@@ -0,0 +1,127 @@
+import datetime
+import logging
+import re
+from typing import Final
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.settings import Settings
+
+from .base import DBRouter
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном DELETE, когда партиций нет (SQLite или MySQL до миграции)
+DELETE_CHUNK_SIZE: Final[int] = 1000
+
+# Партиция pYYYYMMDD хранит посты за этот день, pmax — всё остальное
+PARTITION_NAME = re.compile(r"^p(\d{8})$")
+
+
+def partition_name(day: datetime.date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> datetime.date | None:
+    if m := PARTITION_NAME.match(name):
+        return datetime.datetime.strptime(m.group(1), "%Y%m%d").date()
+    return None
+
+
+def partition_definition(day: datetime.date) -> str:
+    upper = day + datetime.timedelta(days=1)
+    return f"PARTITION {partition_name(day)} VALUES LESS THAN (TO_DAYS('{upper}'))"
+
+
+async def _posts_partitions(session: AsyncSession) -> list[str]:
+    names = await session.scalars(
+        text(
+            "SELECT partition_name FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :table "
+            "AND partition_name IS NOT NULL "
+            "ORDER BY partition_ordinal_position"
+        ),
+        {"table": Post.__tablename__},
+    )
+    return list(names)
+
+
+async def _maintain_mysql_partitions(
+    session: AsyncSession,
+    partitions: list[str],
+    se: Settings,
+) -> None:
+    today: datetime.date = await session.scalar(select(func.curdate()))
+    days = {day for name in partitions if (day := partition_day(name))}
+
+    # Новые партиции можно добавить только после последней; pmax пустая,
+    # пока они создаются заранее, поэтому REORGANIZE не переносит строк
+    last = max(days, default=today - datetime.timedelta(days=1))
+    future = [
+        last + datetime.timedelta(days=offset)
+        for offset in range(1, (today - last).days + se.posts_partitions_ahead + 1)
+    ]
+    if future:
+        definitions = ", ".join(partition_definition(day) for day in future)
+        await session.execute(
+            text(
+                f"ALTER TABLE {Post.__tablename__} REORGANIZE PARTITION pmax INTO "
+                f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
+        )
+        logger.info("posts: created partitions %s", [str(day) for day in future])
+
+    cutoff = today - datetime.timedelta(days=se.posts_retention_days)
+    expired = [partition_name(day) for day in sorted(days) if day < cutoff]
+    if expired:
+        await session.execute(
+            text(
+                f"ALTER TABLE {Post.__tablename__} DROP PARTITION {', '.join(expired)}"
+            )
+        )
+        logger.info("posts: dropped partitions %s", expired)
+
+
+async def _delete_expired_posts(db_router: DBRouter, se: Settings) -> int:
+    deleted = 0
+    async with db_router.background() as session:
+        now: datetime.datetime = await session.scalar(select(func.now()))
+    cutoff = now - datetime.timedelta(days=se.posts_retention_days)
+
+    while True:
+        async with db_router.background() as session:
+            ids = (
+                await session.scalars(
+                    select(Post.id)
+                    .where(Post.created_at < cutoff)
+                    .order_by(Post.id)
+                    .limit(DELETE_CHUNK_SIZE)
+                )
+            ).all()
+            if not ids:
+                return deleted
+            await session.execute(delete(Post).where(Post.id.in_(ids)))
+            await session.commit()
+        deleted += len(ids)
+
+
+async def maintain_posts_partitions(db_router: DBRouter, se: Settings) -> None:
+    """
+    Готовит партиции posts на несколько дней вперёд и удаляет устаревшие.
+
+    Если таблица не партиционирована, устаревшие посты удаляются пачками.
+    """
+    try:
+        partitions: list[str] = []
+        if db_router.primary.dialect.name == "mysql":
+            async with db_router.background() as session:
+                partitions = await _posts_partitions(session)
+                if partitions:
+                    await _maintain_mysql_partitions(session, partitions, se)
+        if not partitions:
+            if deleted := await _delete_expired_posts(db_router, se):
+                logger.info("posts: deleted %s expired rows", deleted)
+    except Exception:
+        logger.exception("posts: partition maintenance failed")
@@ -0,0 +1,109 @@
+import dataclasses
+from collections.abc import Iterable
+from typing import Any, Final
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.utils import fn
+
+from .base import Base
+from .func import _insert_ignore
+from .models import Ignore, MonitoringChannel, Trigger
+
+# Строк в одном многострочном INSERT
+CHUNK_SIZE: Final[int] = 500
+
+
+@dataclasses.dataclass
+class BulkResult:
+    added: int = 0
+    skipped: int = 0
+
+
+def _dedupe(values: Iterable[str], max_length: int) -> tuple[list[str], int]:
+    """
+    Убирает пустые строки, слишком длинные и повторяющиеся значения.
+
+    Сравнение без учёта регистра — так же сравнивает уникальный ключ в MySQL.
+    Возвращает уникальные значения в исходном порядке и число отброшенных.
+    """
+    seen: set[str] = set()
+    unique: list[str] = []
+    dropped = 0
+    for value in values:
+        if not value:
+            continue
+        key = value.casefold()
+        if len(value) > max_length or key in seen:
+            dropped += 1
+            continue
+        seen.add(key)
+        unique.append(value)
+    return unique, dropped
+
+
+def normalize_channel(line: str) -> str:
+    username = line.strip()
+    if not username:
+        return ""
+    if r := fn.Text.clean_invite_link(username):
+        return r
+    if username.startswith("-") or username.startswith("@"):
+        return username
+    return f"@{username}"
+
+
+async def _bulk_insert_ignore(
+    session: AsyncSession,
+    model: type[Base],
+    rows: list[dict[str, Any]],
+) -> int:
+    added = 0
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start : start + CHUNK_SIZE]
+        result = await session.execute(_insert_ignore(session, model).values(chunk))
+        added += result.rowcount
+    return added
+
+
+async def add_channels(session: AsyncSession, lines: Iterable[str]) -> BulkResult:
+    usernames, dropped = _dedupe(
+        (normalize_channel(line) for line in lines),
+        max_length=MonitoringChannel.username.type.length,
+    )
+    added = await _bulk_insert_ignore(
+        session,
+        MonitoringChannel,
+        [{"username": username} for username in usernames],
+    )
+    return BulkResult(added=added, skipped=dropped + len(usernames) - added)
+
+
+async def _add_rules(
+    session: AsyncSession,
+    model: type[Trigger] | type[Ignore],
+    user_id: int,
+    lines: Iterable[str],
+) -> BulkResult:
+    contents, dropped = _dedupe(
+        (line.strip() for line in lines),
+        max_length=model.content.type.length,
+    )
+    added = await _bulk_insert_ignore(
+        session,
+        model,
+        [{"user_id": user_id, "content": content} for content in contents],
+    )
+    return BulkResult(added=added, skipped=dropped + len(contents) - added)
+
+
+async def add_triggers(
+    session: AsyncSession, user_id: int, lines: Iterable[str]
+) -> BulkResult:
+    return await _add_rules(session, Trigger, user_id, lines)
+
+
+async def add_ignores(
+    session: AsyncSession, user_id: int, lines: Iterable[str]
+) -> BulkResult:
+    return await _add_rules(session, Ignore, user_id, lines)
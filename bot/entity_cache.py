@@ -0,0 +1,52 @@
+from collections.abc import Sequence
+from typing import Final
+
+import msgspec
+from redis.asyncio import Redis
+from telethon.tl.types import InputChannel
+
+# Значение ключа для username, которого нет в Telegram
+MISS: Final[bytes] = b"-"
+
+
+def key_build(key: str) -> str:
+    return f"post_manager:entity:{key}"
+
+
+class ChannelEntity(msgspec.Struct):
+    id: int
+    access_hash: int
+    title: str
+
+    @property
+    def input_channel(self) -> InputChannel:
+        return InputChannel(self.id, self.access_hash)
+
+
+_encoder = msgspec.json.Encoder()
+_decoder = msgspec.json.Decoder(ChannelEntity)
+
+
+def _username(channel: str) -> str | None:
+    # В monitoring_channels лежат @username, -100id и хеши приглашений;
+    # резолвить по имени можно только первые
+    if channel.startswith("@") and len(channel) > 1:
+        return channel[1:].casefold()
+    return None
+
+
+async def cached_entities(
+    redis: Redis,
+    usernames: Sequence[str],
+) -> dict[str, ChannelEntity]:
+    """Сущности каналов из Redis одним MGET; ключи — как в monitoring_channels."""
+    names = [(channel, _username(channel)) for channel in usernames]
+    names = [(channel, name) for channel, name in names if name]
+    if not names:
+        return {}
+    raw = await redis.mget([key_build(name) for _, name in names])
+    return {
+        channel: _decoder.decode(value)
+        for (channel, _), value in zip(names, raw)
+        if value is not None and value != MISS
+    }
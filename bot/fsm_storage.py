@@ -0,0 +1,46 @@
+from typing import Any, cast
+
+import msgspec
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder(dict[str, Any])
+_json_decoder = msgspec.json.Decoder(dict[str, Any])
+
+
+class MsgpackRedisStorage(RedisStorage):
+    """
+    RedisStorage, который хранит данные FSM в msgpack: байты из
+    msgspec уходят в Redis как есть, без промежуточной строки.
+
+    Старые значения в JSON читаются прозрачно и при следующей записи
+    перезаписываются уже в msgpack.
+    """
+
+    @staticmethod
+    def encode_data(data: dict[str, Any]) -> bytes:
+        return _encoder.encode(data)
+
+    @staticmethod
+    def decode_data(value: bytes | str) -> dict[str, Any]:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        # msgpack-словарь начинается с байта 0x80–0x8f, 0xde или 0xdf,
+        # JSON-объект — с "{"
+        if value[:1] == b"{":
+            return _json_decoder.decode(value)
+        return _decoder.decode(value)
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        redis_key = self.key_builder.build(key, "data")
+        if not data:
+            await self.redis.delete(redis_key)
+            return
+        await self.redis.set(redis_key, self.encode_data(data), ex=self.data_ttl)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value = await self.redis.get(self.key_builder.build(key, "data"))
+        if value is None:
+            return {}
+        return self.decode_data(cast(bytes, value))
@@ -13,6 +13,7 @@ from telethon.tl.functions.upload import os
 from bot.db.models import Catcher, UserDB
 from bot.keyboards.inline import ik_admin_panel
 from bot.keyboards.reply import rk_cancel
+from bot.login_clients import login_clients
 from bot.settings import se
 from bot.states import UserAdminState
 from bot.utils import fn
@@ -33,6 +34,8 @@ async def cancel_add(
     message: Message,
     state: FSMContext,
 ) -> None:
+    if phone := (await state.get_data()).get("phone"):
+        await login_clients.release(phone)
     await fn.state_clear(state)
     await message.answer(
         "Добавление Ловца отменено",
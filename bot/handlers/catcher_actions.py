@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import TYPE_CHECKING
 
 from aiogram import F, Router
+from bot.catcher_status import registry
 from bot.db.models import Catcher
 from bot.keyboards.factories import BackFactory, CatcherFactory
 from bot.keyboards.inline import (
@@ -15,7 +15,6 @@ from bot.keyboards.inline import (
 )
 from bot.states import CatcherState, UserAdminState
 from bot.utils import fn
-from sqlalchemy import select
 
 if TYPE_CHECKING:
     from aiogram.fsm.context import FSMContext
@@ -68,24 +67,22 @@ async def connect_catcher(
         await query.message.answer(text="Ошибка: catcher не найден в базе данных")
         return
 
-    asyncio.create_task(
-        fn.Manager.start_bot(
-            catcher.phone,
-            catcher.path_session,
-            catcher.api_id,
-            catcher.api_hash,
-        )
-    )
     await query.message.edit_text("Пытаемся подключить Ловца с уже существующей сессией...")
-    await asyncio.sleep(2)
-    if await fn.Manager.bot_run(catcher.phone):
-        catcher.is_connected = True
-        await session.commit()
+    await fn.Manager.start_bot(
+        catcher.phone,
+        catcher.path_session,
+        catcher.api_id,
+        catcher.api_hash,
+    )
+    # is_connected выставляет супервизор, когда процесс запущен
+    if await fn.Manager.wait_started(catcher.phone):
         await query.message.edit_text(
             "Ловец успешно подключен!",
             reply_markup=await ik_action_with_catcher(back_to="catchers"),
         )
         return
+    # Старая сессия не подошла — не перезапускаем ловца, пока не введут код
+    await fn.Manager.stop_bot(phone=catcher.phone)
 
     result = await fn.Telethon.send_code_via_telethon(
         catcher.phone,
@@ -162,6 +159,7 @@ async def delete_catcher(
 
     await session.delete(catcher)
     await session.commit()
+    registry.forget(catcher_id)
 
     await fn.state_clear(state)
     await query.message.edit_text("Бот удален", reply_markup=await ik_admin_panel())
@@ -171,11 +169,10 @@ async def delete_catcher(
 async def back(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
 ) -> None:
     await fn.state_clear(state)
-    catchers = (await session.scalars(select(Catcher))).all()
+    catchers = registry.all()
     await query.message.edit_text(
-        "Ловцы",
-        reply_markup=await ik_available_catchers(list(catchers)),
+        fn.catchers_status_text(catchers),
+        reply_markup=await ik_available_catchers(catchers),
     )
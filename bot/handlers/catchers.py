@@ -4,9 +4,9 @@ import logging
 from typing import TYPE_CHECKING
 
 from aiogram import F, Router
-from sqlalchemy import select
 
-from bot.db.models import Catcher
+from bot.catcher_status import registry
+from bot.heartbeat import read_heartbeats
 from bot.keyboards.inline import (
     ik_available_catchers,
     ik_back,
@@ -15,27 +15,26 @@ from bot.utils import fn
 
 if TYPE_CHECKING:
     from aiogram.types import CallbackQuery
-    from sqlalchemy.ext.asyncio import AsyncSession
+    from redis.asyncio import Redis
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
 @router.callback_query(F.data == "catchers")
-async def show_bots(
-    query: CallbackQuery,
-    session: AsyncSession,
-) -> None:
-    catchers = (await session.scalars(select(Catcher))).all()
+async def show_bots(query: CallbackQuery, redis: Redis) -> None:
+    # Статусы и is_connected поддерживает фоновый цикл реестра, здесь БД не нужна
+    catchers = registry.all()
     if not catchers:
         await query.message.edit_text(
             text="Ловцов еще нет", reply_markup=await ik_back()
         )
         return
-    for catcher in catchers:
-        catcher.is_connected = await fn.Manager.bot_run(catcher.phone)
-    await session.commit()
+
+    # Свежие heartbeat'ы всех ловцов за один запрос к Redis
+    registry.apply_heartbeats(await read_heartbeats(redis, [c.phone for c in catchers]))
+
     await query.message.edit_text(
-        "Ловцы",
-        reply_markup=await ik_available_catchers(list(catchers)),
+        fn.catchers_status_text(catchers),
+        reply_markup=await ik_available_catchers(catchers),
     )
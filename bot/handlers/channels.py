@@ -4,9 +4,11 @@ import logging
 from typing import TYPE_CHECKING
 
 from aiogram import F, Router
-from sqlalchemy import select
+from sqlalchemy import delete
 
+from bot.db import repository
 from bot.db.models import MonitoringChannel
+from bot.join_queue import has_consumer, request_rebalance
 from bot.keyboards.factories import (
     ArrowInfoFactory,
     BackFactory,
@@ -14,20 +16,21 @@ from bot.keyboards.factories import (
     DeleteInfoFactory,
     InfoFactory,
 )
-from bot.keyboards.inline import (
-    ik_action_with_catcher,
-    ik_add_or_delete,
-    ik_cancel_action,
-    ik_num_matrix,
-)
+from bot.keyboards.inline import ik_action_with_catcher, ik_cancel_action
 from bot.states import CatcherState, InfoChannelsState
 from bot.utils import fn
 from bot.utils.func import Chunker
+from bot.utils.page_cache import CHANNELS_KEY, Page, invalidate_channels
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+
     from aiogram.fsm.context import FSMContext
     from aiogram.types import CallbackQuery, Message
-    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from bot.db.base import DBRouter
+    from bot.utils.page_cache import PageCache
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -49,30 +52,60 @@ async def pretty_channels(
     return s[: fn.max_length_message] + "..." if len(s) > fn.max_length_message else s
 
 
+async def get_channels_page(
+    db_router: DBRouter,
+    page_cache: PageCache,
+    ind_chunk: int | None,
+    view: str = "info",
+    anchor: tuple[str, int] | None = None,
+    session: AsyncSession | None = None,
+) -> Page:
+    async def render(count_key: Hashable, primary: bool) -> Page:
+        ch = Chunker()
+        if session is not None:
+            text = await ch(
+                model_db=MonitoringChannel,
+                session=session,
+                ind_chunk=ind_chunk,
+                func_to_str=pretty_channels,
+                if_none_result=IF_NONE_RESULT,
+                count_key=count_key,
+                anchor=anchor,
+            )
+        else:
+            sessionmaker = db_router.writer if primary else db_router.reader
+            async with sessionmaker() as read_session:
+                text = await ch(
+                    model_db=MonitoringChannel,
+                    session=read_session,
+                    ind_chunk=ind_chunk,
+                    func_to_str=pretty_channels,
+                    if_none_result=IF_NONE_RESULT,
+                    count_key=count_key,
+                    anchor=anchor,
+                )
+        return await Page.from_chunk(ch, text, view)
+
+    # Список каналов общий, поэтому владелец всегда 0
+    return await page_cache.get_or_render(CHANNELS_KEY, 0, view, ind_chunk, render)
+
+
 @router.callback_query(CatcherState.actions, InfoFactory.filter(F.key == "channels"))
 async def info_channels(
     query: CallbackQuery | Message,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
-    ch = Chunker()
-    text = await ch(
-        model_db=MonitoringChannel,
-        session=session,
-        ind_chunk=None,
-        func_to_str=pretty_channels,
-        if_none_result=IF_NONE_RESULT,
-    )
+    page = await get_channels_page(db_router, page_cache, None)
 
-    await query.message.edit_text(
-        text=text,
-        reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
-    )
+    await query.message.edit_text(text=page.text, reply_markup=page.markup)
 
     await state.set_state(InfoChannelsState.info)
     await state.update_data(
-        ind_chunk=ch.ind_chunk,
-        quantity_chunks=ch.quantity_chunks,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
 
 
@@ -81,13 +114,17 @@ async def arrow_channels_info(
     query: CallbackQuery,
     callback_data: ArrowInfoFactory,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
     arrow = callback_data.to
 
     data_state = await state.get_data()
     ind_chunk = data_state["ind_chunk"]
     quantity_chunks = data_state["quantity_chunks"]
+    anchor = Chunker.anchor_for(
+        arrow, ind_chunk, quantity_chunks, data_state.get("chunk_bounds")
+    )
 
     match arrow:
         case "left":
@@ -95,23 +132,17 @@ async def arrow_channels_info(
         case "right":
             ind_chunk = ind_chunk + 1 if ind_chunk < quantity_chunks else 1
 
-    ch = Chunker()
-    text = await ch(
-        model_db=MonitoringChannel,
-        session=session,
-        ind_chunk=ind_chunk,
-        func_to_str=pretty_channels,
-        if_none_result=IF_NONE_RESULT,
-    )
+    page = await get_channels_page(db_router, page_cache, ind_chunk, anchor=anchor)
     try:
-        await query.message.edit_text(
-            text=text,
-            reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
-        )
+        await query.message.edit_text(text=page.text, reply_markup=page.markup)
     except Exception:
         await query.answer("Страница всего одна :(")
 
-    await state.update_data(ind_chunk=ch.ind_chunk, quantity_chunks=ch.quantity_chunks)
+    await state.update_data(
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
+    )
 
 
 @router.callback_query(InfoChannelsState.info, F.data == "add")
@@ -131,50 +162,32 @@ async def channels_ids_to_add(
     message: Message,
     state: FSMContext,
     session: AsyncSession,
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
-    usernames_to_add = []
-    for username in message.text.splitlines():
-        username = username.strip()
-        if r := fn.Text.clean_invite_link(username):
-            usernames_to_add.append(r)
-        elif username.startswith("-"):
-            usernames_to_add.append(username)
-        elif not username.startswith("@"):
-            usernames_to_add.append(f"@{username}")
-        else:
-            usernames_to_add.append(username)
+    result = await repository.add_channels(session, message.text.splitlines())
+    await session.commit()
+    await invalidate_channels(page_cache)
+    # Назначение ловцов — в фоне: ответ не ждёт перераспределения всех каналов
+    rebalancing = request_rebalance()
 
     data_state = await state.get_data()
 
-    channels = (await session.scalars(select(MonitoringChannel))).all()
-    channels_usernames = [channel.username for channel in channels]
-    new_channels = [
-        MonitoringChannel(username=username)
-        for username in usernames_to_add
-        if username not in channels_usernames
-    ]
-
-    session.add_all(new_channels)
-    await session.commit()
-
-    async with sessionmaker() as new_session:
-        ch = Chunker()
-        text = await ch(
-            model_db=MonitoringChannel,
-            session=new_session,
-            ind_chunk=data_state["ind_chunk"],
-            func_to_str=pretty_channels,
-            if_none_result=IF_NONE_RESULT,
-        )
+    page = await get_channels_page(
+        db_router, page_cache, data_state["ind_chunk"], session=session
+    )
 
+    text = f"Добавлено: {result.added}, пропущено: {result.skipped}"
+    if rebalancing and result.added and has_consumer():
+        text += "\nНовые каналы встанут в очередь на вступление"
     msg = await message.answer(
-        text=text,
-        reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
+        text=f"{text}\n\n{page.text}",
+        reply_markup=page.markup,
     )
     await state.update_data(
-        ind_chunk=ch.ind_chunk,
-        quantity_chunks=ch.quantity_chunks,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
     await fn.set_general_message(state, msg)
     await state.set_state(InfoChannelsState.info)
@@ -184,25 +197,17 @@ async def channels_ids_to_add(
 async def delete_channels(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
     data_state = await state.get_data()
-    ch = Chunker()
-    await ch(
-        model_db=MonitoringChannel,
-        session=session,
-        ind_chunk=data_state["ind_chunk"],
-        func_to_str=pretty_channels,
-        if_none_result=IF_NONE_RESULT,
+    page = await get_channels_page(
+        db_router, page_cache, data_state["ind_chunk"], view="delete"
     )
 
-    channels_ids = [channel.id for channel in ch.chunk]
-    start_ind = (ch.ind_chunk - 1) * 10
-    await query.message.edit_reply_markup(
-        reply_markup=await ik_num_matrix(channels_ids, start_ind, "info")
-    )
+    await query.message.edit_reply_markup(reply_markup=page.markup)
     await state.set_state(InfoChannelsState.delete)
-    await state.update_data(channels_ids=channels_ids)
+    await state.update_data(channels_ids=page.ids)
 
 
 @router.callback_query(InfoChannelsState.delete, DeleteInfoFactory.filter())
@@ -211,41 +216,42 @@ async def channels_delete_by_id_obj(
     callback_data: DeleteInfoFactory,
     state: FSMContext,
     session: AsyncSession,
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
     channel_id_to_delete = callback_data.id
-    channel = await session.get(MonitoringChannel, channel_id_to_delete)
-
-    await session.delete(channel)
+    await session.execute(
+        delete(MonitoringChannel).where(MonitoringChannel.id == channel_id_to_delete)
+    )
     await session.commit()
+    await invalidate_channels(page_cache)
 
-    async with sessionmaker() as new_session:
-        data_state = await state.get_data()
-        ch = Chunker()
-        text = await ch(
-            model_db=MonitoringChannel,
-            session=new_session,
-            ind_chunk=data_state["ind_chunk"],
-            func_to_str=pretty_channels,
-            if_none_result=IF_NONE_RESULT,
-        )
-    channels_ids = [channel.id for channel in ch.chunk]
-    start_ind = (ch.ind_chunk - 1) * 10
+    data_state = await state.get_data()
+    page = await get_channels_page(
+        db_router,
+        page_cache,
+        data_state["ind_chunk"],
+        view="delete",
+        session=session,
+    )
 
-    await query.message.edit_text(
-        text,
-        reply_markup=await ik_num_matrix(channels_ids, start_ind, "info"),
+    await query.message.edit_text(page.text, reply_markup=page.markup)
+    await state.update_data(
+        channels_ids=page.ids,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
-    await state.update_data(channels_ids=channels_ids)
 
 
 @router.callback_query(InfoChannelsState.delete, BackFactory.filter(F.to == "info"))
 async def back_info(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
-    await info_channels(query, state, session)
+    await info_channels(query, state, db_router, page_cache)
 
 
 @router.callback_query(InfoChannelsState.info, BackFactory.filter(F.to == "default"))
@@ -270,22 +276,13 @@ async def back_channels(
 async def cancel_add_channels(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
     data_state = await state.get_data()
-    ch = Chunker()
-    text = await ch(
-        model_db=MonitoringChannel,
-        session=session,
-        ind_chunk=data_state["ind_chunk"],
-        func_to_str=pretty_channels,
-        if_none_result=IF_NONE_RESULT,
-    )
+    page = await get_channels_page(db_router, page_cache, data_state["ind_chunk"])
 
-    msg = await query.message.answer(
-        text=text,
-        reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
-    )
+    msg = await query.message.answer(text=page.text, reply_markup=page.markup)
 
     await fn.set_general_message(state, msg)
     await state.set_state(InfoChannelsState.info)
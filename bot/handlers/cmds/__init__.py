@@ -1,7 +1,8 @@
-from . import start, reg_catcher, create_deep_link
+from . import start, reg_catcher, create_deep_link, stats
 from aiogram import Router
 
 router = Router()
 router.include_router(start.router)
 router.include_router(reg_catcher.router)
 router.include_router(create_deep_link.router)
+router.include_router(stats.router)
@@ -13,6 +13,7 @@ from sqlalchemy import select
 
 from bot.db.models import Catcher, UserDB
 from bot.keyboards.reply import rk_cancel
+from bot.login_clients import login_clients
 from bot.settings import se
 from bot.states import UserAdminState
 from bot.utils import fn
@@ -31,6 +32,8 @@ async def cancel_reg(
     message: Message,
     state: FSMContext,
 ) -> None:
+    if phone := (await state.get_data()).get("phone"):
+        await login_clients.release(phone)
     await fn.state_clear(state)
     msg = await message.answer(
         "Добавление бота отменено",
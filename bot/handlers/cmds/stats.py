@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from aiogram import Router
+from aiogram.filters.command import Command
+
+from bot.scheduler import default_scheduler as scheduler
+
+if TYPE_CHECKING:
+    from aiogram.types import Message
+
+    from bot.db.base import DBRouter
+    from bot.db.models import UserDB
+
+
+router = Router()
+
+
+@router.message(Command(commands=["stats"]))
+async def show_stats(
+    message: Message,
+    user: UserDB | None,
+    db_router: DBRouter,
+) -> None:
+    if not user or not user.is_admin:
+        await message.answer("Вы не администратор")
+        return
+
+    primary = db_router.pool_stats["primary"]
+    lines = [
+        "<b>Пул БД</b>",
+        f"Апдейтов: {primary.updates}",
+        f"Из них хендлер обращался к БД: {primary.updates_with_db}",
+    ]
+    for name, stats in db_router.pool_stats.items():
+        lines.append(
+            f"{name}: выдано {stats.checkouts}, "
+            f"занято {stats.in_use} (пик {stats.peak_in_use})"
+        )
+
+    lines.append("\n<b>Планировщик</b>")
+    for job_id, stats in scheduler.metrics().items():
+        lines.append(
+            f"{job_id}: запусков {stats.runs}, ошибок {stats.failures}, "
+            f"таймаутов {stats.timeouts}, пропущено {stats.skipped}\n"
+            f"  длительность p50 ≤{stats.percentile(0.5)}с, "
+            f"p95 ≤{stats.percentile(0.95)}с, макс {stats.max_duration:.3f}с\n"
+            f"  опоздание {stats.last_lag:.3f}с (макс {stats.max_lag:.3f}с), "
+            f"дольше интервала {stats.overruns}"
+        )
+    await message.answer("\n".join(lines))
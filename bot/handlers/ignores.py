@@ -4,8 +4,9 @@ import logging
 from typing import TYPE_CHECKING
 
 from aiogram import F, Router
-from sqlalchemy import select
+from sqlalchemy import delete
 
+from bot.db import repository
 from bot.db.models import Ignore, UserDB
 from bot.keyboards.factories import (
     ArrowInfoFactory,
@@ -15,24 +16,29 @@ from bot.keyboards.factories import (
     InfoFactory,
 )
 from bot.keyboards.inline import (
-    ik_add_or_delete,
     ik_cancel_action,
-    ik_num_matrix,
     ik_profile,
 )
 from bot.states import InfoIgnoresState, UserState
 from bot.utils import fn
 from bot.utils.func import Chunker
+from bot.utils.page_cache import Page
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+
     from aiogram.fsm.context import FSMContext
     from aiogram.types import CallbackQuery, Message
-    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from bot.db.base import DBRouter
+    from bot.utils.page_cache import PageCache
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 IF_NONE_RESULT = "Нет игноров"
+KEY = "ignore"
 
 
 async def pretty_ignores(
@@ -49,36 +55,69 @@ async def pretty_ignores(
     return s[: fn.max_length_message] + "..." if len(s) > fn.max_length_message else s
 
 
-@router.callback_query(UserState.actions, InfoFactory.filter(F.key == "ignore"))
-async def info_ignores(
-    query: CallbackQuery | Message,
-    state: FSMContext,
+async def get_ignores_chunk(
     session: AsyncSession,
     user: UserDB,
-) -> None:
-    fetched_data = user.ignores
+    ind_chunk: int | None,
+    count_key: Hashable,
+    anchor: tuple[str, int] | None = None,
+) -> tuple[Chunker, str]:
     ch = Chunker()
     text = await ch(
-        model_db=None,
+        model_db=Ignore,
         session=session,
-        ind_chunk=None,
+        ind_chunk=ind_chunk,
         func_to_str=pretty_ignores,
         if_none_result=IF_NONE_RESULT,
-        fetched_data=fetched_data,
+        where=(Ignore.user_id == user.id,),
+        count_key=count_key,
+        anchor=anchor,
     )
+    return ch, text
+
+
+async def get_ignores_page(
+    db_router: DBRouter,
+    page_cache: PageCache,
+    user: UserDB,
+    ind_chunk: int | None,
+    view: str = "info",
+    anchor: tuple[str, int] | None = None,
+    session: AsyncSession | None = None,
+) -> Page:
+    async def render(count_key: Hashable, primary: bool) -> Page:
+        if session is not None:
+            ch, text = await get_ignores_chunk(
+                session, user, ind_chunk, count_key, anchor
+            )
+        else:
+            sessionmaker = db_router.writer if primary else db_router.reader
+            async with sessionmaker() as read_session:
+                ch, text = await get_ignores_chunk(
+                    read_session, user, ind_chunk, count_key, anchor
+                )
+        return await Page.from_chunk(ch, text, view)
+
+    return await page_cache.get_or_render(KEY, user.id, view, ind_chunk, render)
 
-    await query.message.edit_text(
-        text=text,
-        reply_markup=await ik_add_or_delete(
-            ch.ind_chunk,
-            ch.quantity_chunks,
-        ),
-    )
+
+@router.callback_query(UserState.actions, InfoFactory.filter(F.key == "ignore"))
+async def info_ignores(
+    query: CallbackQuery | Message,
+    state: FSMContext,
+    db_router: DBRouter,
+    page_cache: PageCache,
+    user: UserDB,
+) -> None:
+    page = await get_ignores_page(db_router, page_cache, user, None)
+
+    await query.message.edit_text(text=page.text, reply_markup=page.markup)
 
     await state.set_state(InfoIgnoresState.info)
     await state.update_data(
-        ind_chunk=ch.ind_chunk,
-        quantity_chunks=ch.quantity_chunks,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
 
 
@@ -88,13 +127,17 @@ async def arrow_ignores_info(
     callback_data: ArrowInfoFactory,
     state: FSMContext,
     user: UserDB,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
 ) -> None:
     arrow = callback_data.to
 
     data_state = await state.get_data()
     ind_chunk = data_state["ind_chunk"]
     quantity_chunks = data_state["quantity_chunks"]
+    anchor = Chunker.anchor_for(
+        arrow, ind_chunk, quantity_chunks, data_state.get("chunk_bounds")
+    )
 
     match arrow:
         case "left":
@@ -102,25 +145,17 @@ async def arrow_ignores_info(
         case "right":
             ind_chunk = ind_chunk + 1 if ind_chunk < quantity_chunks else 1
 
-    fetched_data = user.ignores
-    ch = Chunker()
-    text = await ch(
-        model_db=None,
-        session=session,
-        ind_chunk=ind_chunk,
-        func_to_str=pretty_ignores,
-        if_none_result=IF_NONE_RESULT,
-        fetched_data=fetched_data,
-    )
+    page = await get_ignores_page(db_router, page_cache, user, ind_chunk, anchor=anchor)
     try:
-        await query.message.edit_text(
-            text=text,
-            reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
-        )
+        await query.message.edit_text(text=page.text, reply_markup=page.markup)
     except Exception:
         await query.answer("-")
 
-    await state.update_data(ind_chunk=ch.ind_chunk, quantity_chunks=ch.quantity_chunks)
+    await state.update_data(
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
+    )
 
 
 @router.callback_query(InfoIgnoresState.info, F.data == "add")
@@ -140,48 +175,28 @@ async def ignores_ids_to_add(
     message: Message,
     state: FSMContext,
     session: AsyncSession,
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
+    page_cache: PageCache,
     user: UserDB,
 ) -> None:
-    ignores_to_add = [username.strip() for username in message.text.splitlines()]
+    result = await repository.add_ignores(session, user.id, message.text.splitlines())
+    await session.commit()
+    await page_cache.invalidate(KEY, user.id)
 
     data_state = await state.get_data()
 
-    ignores = await user.awaitable_attrs.ignores
-    ignores_contents = [ignore.content for ignore in ignores]
-    new_ignores = [
-        Ignore(content=ignore)
-        for ignore in ignores_to_add
-        if ignore not in ignores_contents
-    ]
-
-    user.ignores.extend(new_ignores)
-    await session.commit()
-
-    async with sessionmaker() as new_session:
-        fetched_data = (
-            await new_session.scalars(select(Ignore).where(Ignore.user_id == user.id))
-        ).all()
-        ch = Chunker()
-        text = await ch(
-            model_db=None,
-            session=new_session,
-            ind_chunk=data_state["ind_chunk"],
-            func_to_str=pretty_ignores,
-            if_none_result=IF_NONE_RESULT,
-            fetched_data=list(fetched_data),
-        )
+    page = await get_ignores_page(
+        db_router, page_cache, user, data_state["ind_chunk"], session=session
+    )
 
     msg = await message.answer(
-        text=text,
-        reply_markup=await ik_add_or_delete(
-            ch.ind_chunk,
-            ch.quantity_chunks,
-        ),
+        text=f"Добавлено: {result.added}, пропущено: {result.skipped}\n\n{page.text}",
+        reply_markup=page.markup,
     )
     await state.update_data(
-        ind_chunk=ch.ind_chunk,
-        quantity_chunks=ch.quantity_chunks,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
     await fn.set_general_message(state, msg)
     await state.set_state(InfoIgnoresState.info)
@@ -191,29 +206,19 @@ async def ignores_ids_to_add(
 async def delete_ignores(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
     user: UserDB,
 ) -> None:
     data_state = await state.get_data()
 
-    fetched_data = user.ignores
-    ch = Chunker()
-    await ch(
-        model_db=None,
-        session=session,
-        ind_chunk=data_state["ind_chunk"],
-        func_to_str=pretty_ignores,
-        if_none_result=IF_NONE_RESULT,
-        fetched_data=fetched_data,
+    page = await get_ignores_page(
+        db_router, page_cache, user, data_state["ind_chunk"], view="delete"
     )
 
-    ignores_ids = [ignore.id for ignore in ch.chunk]
-    start_ind = (ch.ind_chunk - 1) * 10
-    await query.message.edit_reply_markup(
-        reply_markup=await ik_num_matrix(ignores_ids, start_ind, "info")
-    )
+    await query.message.edit_reply_markup(reply_markup=page.markup)
     await state.set_state(InfoIgnoresState.delete)
-    await state.update_data(ignores_ids=ignores_ids)
+    await state.update_data(ignores_ids=page.ids)
 
 
 @router.callback_query(InfoIgnoresState.delete, DeleteInfoFactory.filter())
@@ -222,47 +227,48 @@ async def ignores_delete_by_id_obj(
     callback_data: DeleteInfoFactory,
     state: FSMContext,
     session: AsyncSession,
-    sessionmaker: async_sessionmaker[AsyncSession],
+    db_router: DBRouter,
+    page_cache: PageCache,
     user: UserDB,
 ) -> None:
     ignore_id_to_delete = callback_data.id
-    ignore = await session.get(Ignore, ignore_id_to_delete)
-
-    await session.delete(ignore)
+    await session.execute(
+        delete(Ignore).where(
+            Ignore.id == ignore_id_to_delete,
+            Ignore.user_id == user.id,
+        )
+    )
     await session.commit()
+    await page_cache.invalidate(KEY, user.id)
 
-    async with sessionmaker() as new_session:
-        data_state = await state.get_data()
-        fetched_data = (
-            await new_session.scalars(select(Ignore).where(Ignore.user_id == user.id))
-        ).all()
-        ch = Chunker()
-        text = await ch(
-            model_db=None,
-            session=new_session,
-            ind_chunk=data_state["ind_chunk"],
-            func_to_str=pretty_ignores,
-            if_none_result=IF_NONE_RESULT,
-            fetched_data=list(fetched_data),
-        )
-    ignores_ids = [ignore.id for ignore in ch.chunk]
-    start_ind = (ch.ind_chunk - 1) * 10
+    data_state = await state.get_data()
+    page = await get_ignores_page(
+        db_router,
+        page_cache,
+        user,
+        data_state["ind_chunk"],
+        view="delete",
+        session=session,
+    )
 
-    await query.message.edit_text(
-        text,
-        reply_markup=await ik_num_matrix(ignores_ids, start_ind, "info"),
+    await query.message.edit_text(page.text, reply_markup=page.markup)
+    await state.update_data(
+        ignores_ids=page.ids,
+        ind_chunk=page.ind_chunk,
+        quantity_chunks=page.quantity_chunks,
+        chunk_bounds=page.bounds,
     )
-    await state.update_data(ignores_ids=ignores_ids)
 
 
 @router.callback_query(InfoIgnoresState.delete, BackFactory.filter(F.to == "info"))
 async def back_info(
     query: CallbackQuery,
     state: FSMContext,
-    session: AsyncSession,
+    db_router: DBRouter,
+    page_cache: PageCache,
     user: UserDB,
 ) -> None:
-    await info_ignores(query, state, session, user)
+    await info_ignores(query, state, db_router, page_cache, user)
 
 
 @router.callback_query(InfoIgnoresState.info, BackFactory.filter(F.to == "default"))
@@ -287,25 +293,17 @@ async def back_ignores(
 
 @router.callback_query(InfoIgnoresState.add, CancelFactory.filter(F.to == "default"))
 async def cancel_add_ignores(
-    query: CallbackQuery, state: FSMContext, session: AsyncSession, user: UserDB
+    query: CallbackQuery,
+    state: FSMContext,
+    db_router: DBRouter,
+    page_cache: PageCache,
+    user: UserDB,
 ) -> None:
     data_state = await state.get_data()
 
-    fetched_data = user.ignores
-    ch = Chunker()
-    text = await ch(
-        model_db=None,
-        session=session,
-        ind_chunk=data_state["ind_chunk"],
-        func_to_str=pretty_ignores,
-        if_none_result=IF_NONE_RESULT,
-        fetched_data=fetched_data,
-    )
+    page = await get_ignores_page(db_router, page_cache, user, data_state["ind_chunk"])
 
-    msg = await query.message.answer(
-        text=text,
-        reply_markup=await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks),
-    )
+    msg = await query.message.answer(text=page.text, reply_markup=page.markup)
 
     await fn.set_general_message(state, msg)
     await state.set_state(InfoIgnoresState.info)
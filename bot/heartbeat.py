@@ -0,0 +1,95 @@
+import logging
+import os
+import socket
+import time
+from collections.abc import Sequence
+from typing import Final
+
+import msgspec
+from redis.asyncio import Redis
+
+from bot.redis_pool import pipeline
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat пишется чаще, чем истекает ключ; пропавший ключ — ловец мёртв.
+# Пишут встроенные ловцы (CatcherRuntime) и супервизор за свои процессы;
+# ловец на другой машине виден, только если сам пишет через write_heartbeat
+HEARTBEAT_INTERVAL: Final[float] = 10
+HEARTBEAT_TTL: Final[int] = 30
+
+
+def key_build(phone: str) -> str:
+    return f"post_manager:heartbeat:{phone}"
+
+
+class CatcherHeartbeat(msgspec.Struct, omit_defaults=True):
+    """
+    Состояние ловца, которое он сам публикует в Redis. Формат общий для
+    ловцов на любых машинах, поэтому поля только добавляются.
+    """
+
+    phone: str
+    host: str = msgspec.field(default_factory=socket.gethostname)
+    pid: int = msgspec.field(default_factory=os.getpid)
+    sent_at: float = msgspec.field(default_factory=time.time)
+    channels: int = 0
+    last_post_at: float | None = None
+    last_message_id: int | None = None
+    posts: int = 0
+    errors: int = 0
+    flood_waits: int = 0
+    # Очередь вступления в каналы (bot.join_queue)
+    join_pending: int = 0
+    joined: int = 0
+    join_failed: int = 0
+
+
+_encoder = msgspec.json.Encoder()
+_decoder = msgspec.json.Decoder(CatcherHeartbeat)
+
+
+async def write_heartbeat(
+    redis: Redis,
+    heartbeat: CatcherHeartbeat,
+    ttl: int = HEARTBEAT_TTL,
+) -> None:
+    """Heartbeat одного ловца: для супервизора и для ловцов вне процесса бота."""
+    await redis.set(key_build(heartbeat.phone), _encoder.encode(heartbeat), ex=ttl)
+
+
+async def write_heartbeats(
+    redis: Redis,
+    heartbeats: Sequence[CatcherHeartbeat],
+    ttl: int = HEARTBEAT_TTL,
+) -> None:
+    """Пишет heartbeat'ы нескольких ловцов одного процесса за один запрос."""
+    if not heartbeats:
+        return
+    async with pipeline(redis) as pipe:
+        for heartbeat in heartbeats:
+            pipe.set(key_build(heartbeat.phone), _encoder.encode(heartbeat), ex=ttl)
+        await pipe.execute()
+
+
+async def delete_heartbeat(redis: Redis, phone: str) -> None:
+    await redis.delete(key_build(phone))
+
+
+async def read_heartbeats(
+    redis: Redis,
+    phones: Sequence[str],
+) -> dict[str, CatcherHeartbeat]:
+    """Читает heartbeat всех ловцов одним MGET; живые есть в результате."""
+    if not phones:
+        return {}
+    raw = await redis.mget([key_build(phone) for phone in phones])
+    heartbeats: dict[str, CatcherHeartbeat] = {}
+    for phone, value in zip(phones, raw):
+        if value is None:
+            continue
+        try:
+            heartbeats[phone] = _decoder.decode(value)
+        except msgspec.DecodeError:
+            logger.warning("Malformed heartbeat for catcher %s", phone)
+    return heartbeats
@@ -0,0 +1,161 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Final
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.base import DBRouter
+from bot.db.func import _db_utc_offset, _insert_ignore
+from bot.db.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном многострочном INSERT
+CHUNK_SIZE: Final[int] = 500
+# Сколько строк держать в памяти, пока БД недоступна; сверх этого — теряем
+MAX_PENDING: Final[int] = 50_000
+# Потолок паузы между повторами, пока запись в БД не проходит
+MAX_RETRY_DELAY: Final[float] = 30
+# Как часто перечитывать смещение часов БД от UTC (переход на летнее время)
+UTC_OFFSET_TTL: Final[float] = 10 * 60
+
+
+class PostWriter:
+    """
+    Копит посты от ловцов и пишет их в posts многострочными INSERT IGNORE:
+    когда набралось max_batch строк или прошло max_delay секунд с первой
+    строки в буфере. Повтор поста отсекает уникальный ключ
+    (channel_username, message_id, created_at).
+
+    created_at, как и везде в posts, — время по часам БД: так же его
+    заполняет NOW() у ловцов-процессов, по нему режутся партиции и
+    считается срок хранения. Дата сообщения переводится из UTC в часы БД
+    при записи.
+    """
+
+    def __init__(
+        self,
+        db_router: DBRouter,
+        max_batch: int = 500,
+        max_delay: float = 0.5,
+    ) -> None:
+        self.db_router = db_router
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._buffer: list[dict[str, Any]] = []
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closing = asyncio.Event()
+        # Неудачных flush подряд; от него растёт пауза перед повтором
+        self._failures = 0
+        self._utc_offset: datetime.timedelta | None = None
+        self._utc_offset_at = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        # Не отменяем цикл: он может быть посреди flush с уже вынутой пачкой.
+        # Даём ему закончить и дописываем остаток сами
+        if self._task is not None:
+            self._closing.set()
+            self._pending.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def add(
+        self,
+        channel_username: str,
+        message_id: int,
+        content: str,
+        created_at: datetime.datetime,
+    ) -> None:
+        self._pending.set()
+        self._buffer.append(
+            {
+                "channel_username": channel_username,
+                "message_id": message_id,
+                "content": content[: Post.content.type.length],
+                # Наивное UTC; в часы БД переводится в flush
+                "created_at": created_at.astimezone(datetime.UTC).replace(tzinfo=None),
+            }
+        )
+        if len(self._buffer) >= self.max_batch:
+            self._full.set()
+
+    async def flush(self) -> int:
+        rows, self._buffer = self._buffer, []
+        self._pending.clear()
+        self._full.clear()
+        if not rows:
+            return 0
+
+        added = 0
+        try:
+            async with self.db_router.writer() as session:
+                offset = await self._db_utc_offset(session)
+                for start in range(0, len(rows), CHUNK_SIZE):
+                    chunk = [
+                        row | {"created_at": row["created_at"] + offset}
+                        for row in rows[start : start + CHUNK_SIZE]
+                    ]
+                    result = await session.execute(
+                        _insert_ignore(session, Post).values(chunk)
+                    )
+                    added += result.rowcount
+                await session.commit()
+        except asyncio.CancelledError:
+            self._requeue(rows)
+            raise
+        except Exception:
+            self._failures += 1
+            if self._failures == 1:
+                logger.exception("Failed to write %s posts", len(rows))
+            else:
+                logger.warning(
+                    "Failed to write %s posts (%s attempts), retry in %ss",
+                    len(rows),
+                    self._failures,
+                    self._retry_delay(),
+                )
+            self._requeue(rows)
+            return 0
+        self._failures = 0
+        return added
+
+    async def _db_utc_offset(self, session: AsyncSession) -> datetime.timedelta:
+        now = time.monotonic()
+        if self._utc_offset is None or now - self._utc_offset_at > UTC_OFFSET_TTL:
+            self._utc_offset = await _db_utc_offset(session)
+            self._utc_offset_at = now
+        return self._utc_offset
+
+    def _retry_delay(self) -> float:
+        return min(self.max_delay * 2**self._failures, MAX_RETRY_DELAY)
+
+    def _requeue(self, rows: list[dict[str, Any]]) -> None:
+        # Вернём строки в начало буфера, чтобы не потерять их при сбое БД
+        self._buffer[:0] = rows[-MAX_PENDING:]
+        del self._buffer[MAX_PENDING:]
+        self._pending.set()
+
+    async def _run(self) -> None:
+        while not self._closing.is_set():
+            await self._pending.wait()
+            if self._closing.is_set():
+                return
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except TimeoutError:
+                pass
+            await self.flush()
+            if self._failures:
+                try:
+                    await asyncio.wait_for(self._closing.wait(), self._retry_delay())
+                except TimeoutError:
+                    pass
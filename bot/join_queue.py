@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+from typing import Final
+
+from redis.asyncio import Redis
+from telethon.errors import FloodWaitError, RPCError, UserAlreadyParticipantError
+from telethon.tl.functions.channels import JoinChannelRequest
+from telethon.tl.functions.messages import ImportChatInviteRequest
+
+from bot.catcher_runtime import CatcherClient, CatcherRuntime, runtime
+from bot.db.assignments import rebalance_channels
+from bot.db.base import DBRouter
+from bot.entity_cache import cached_entities
+from bot.redis_pool import pipeline
+from bot.scheduler import default_scheduler as scheduler
+from bot.settings import se
+
+logger = logging.getLogger(__name__)
+
+# Пауза между вступлениями одного аккаунта, чтобы не упираться в FloodWait
+JOIN_INTERVAL: Final[float] = 15
+# Как часто проверять очереди
+TICK: Final[float] = 1
+# Потолок паузы аккаунта после неожиданных ошибок подряд (сеть, отключение)
+MAX_ERROR_DELAY: Final[float] = 15 * 60
+# Тег задачи планировщика с rebalance_and_enqueue
+REBALANCE_TAG: Final[str] = "rebalance_channels"
+
+# Ссылки на запущенные вне очереди задачи, чтобы их не собрал GC
+_background: set[asyncio.Task] = set()
+
+
+def key_build(phone: str) -> str:
+    return f"post_manager:join_queue:{phone}"
+
+
+async def enqueue_joins(redis: Redis, joins: dict[str, list[str]]) -> int:
+    """Ставит каналы в очереди ловцов; уже стоящие в очереди не сдвигаются."""
+    if not joins:
+        return 0
+    now = time.time()
+    async with pipeline(redis) as pipe:
+        for phone, channels in joins.items():
+            pipe.zadd(key_build(phone), dict.fromkeys(channels, now), nx=True)
+        return sum(await pipe.execute())
+
+
+def has_consumer() -> bool:
+    # Очереди разбирает JoinQueue встроенных ловцов; для ловцов-процессов
+    # её никто не запускает, и ZSET'ы только копились бы
+    return se.catcher_mode == "inprocess"
+
+
+async def rebalance_and_enqueue(db_router: DBRouter, redis: Redis) -> int | None:
+    """
+    Перераспределяет каналы и, если очереди есть кому разбирать, отправляет
+    новых владельцев вступать в них. Возвращает число каналов, впервые
+    поставленных в очереди, или None, когда очередей нет.
+    """
+    result = await rebalance_channels(db_router)
+    if not has_consumer():
+        return None
+    return await enqueue_joins(redis, result.joins)
+
+
+def request_rebalance() -> bool:
+    """
+    Запускает задачу перераспределения сейчас, не дожидаясь минутного слота
+    и её завершения. Идёт под блокировкой задачи, поэтому не пересекается с
+    плановым запуском на этой или другой реплике.
+    """
+    jobs = scheduler.get_jobs(REBALANCE_TAG)
+    if not jobs:
+        return False
+    task = asyncio.create_task(scheduler.run_once(jobs[0]))
+    _background.add(task)
+    task.add_done_callback(_rebalance_done)
+    return True
+
+
+def _rebalance_done(task: asyncio.Task) -> None:
+    _background.discard(task)
+    if not task.cancelled() and (e := task.exception()) is not None:
+        logger.error("Channel rebalance failed", exc_info=e)
+
+
+class JoinQueue:
+    """
+    Разбирает очереди вступления ловцов, запущенных в этом процессе.
+
+    Очередь — ZSET в Redis: канал со временем, не раньше которого к нему
+    можно обращаться. Каждый аккаунт вступает не чаще раза в JOIN_INTERVAL,
+    а при FloodWait канал и сам аккаунт откладываются на указанное время.
+    Прогресс уходит в heartbeat ловца.
+    """
+
+    def __init__(self, runtime: CatcherRuntime) -> None:
+        self.runtime = runtime
+        # Телефон ловца -> время, раньше которого он ничего не делает
+        self._next_at: dict[str, float] = {}
+        # Телефон ловца -> неожиданных ошибок подряд
+        self._errors: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self, redis: Redis) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(redis))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, redis: Redis) -> None:
+        while True:
+            try:
+                await self.tick(redis)
+            except Exception:
+                logger.exception("Join queue tick failed")
+            await asyncio.sleep(TICK)
+
+    async def tick(self, redis: Redis) -> None:
+        now = time.time()
+        ready = [
+            catcher
+            for catcher in self.runtime.running()
+            if self._next_at.get(catcher.spec.phone, 0) <= now
+        ]
+        if not ready:
+            return
+
+        # Голова очереди и её длина для всех готовых ловцов за один запрос
+        async with pipeline(redis) as pipe:
+            for catcher in ready:
+                key = key_build(catcher.spec.phone)
+                pipe.zrangebyscore(key, "-inf", now, start=0, num=1)
+                pipe.zcard(key)
+            replies = await pipe.execute()
+
+        jobs = []
+        for catcher, due, pending in zip(ready, replies[::2], replies[1::2]):
+            catcher.heartbeat.join_pending = pending
+            if due:
+                jobs.append(self._join(redis, catcher, due[0].decode()))
+        await asyncio.gather(*jobs)
+
+    async def _join(self, redis: Redis, catcher: CatcherClient, channel: str) -> None:
+        phone = catcher.spec.phone
+        key = key_build(phone)
+        heartbeat = catcher.heartbeat
+        try:
+            await self._request(redis, catcher, channel)
+        except FloodWaitError as e:
+            logger.warning("Catcher %s FloodWait %ss on join", phone, e.seconds)
+            heartbeat.flood_waits += 1
+            until = time.time() + e.seconds
+            self._next_at[phone] = until
+            await redis.zadd(key, {channel: until}, xx=True)
+            return
+        except (RPCError, ValueError) as e:
+            logger.warning("Catcher %s failed to join %s: %s", phone, channel, e)
+            heartbeat.join_failed += 1
+        except Exception:
+            # Канал остаётся в очереди, аккаунт ждёт всё дольше
+            errors = self._errors[phone] = self._errors.get(phone, 0) + 1
+            delay = min(JOIN_INTERVAL * 2**errors, MAX_ERROR_DELAY)
+            logger.exception(
+                "Catcher %s error on joining %s, retry in %ss", phone, channel, delay
+            )
+            heartbeat.errors += 1
+            self._next_at[phone] = time.time() + delay
+            return
+        else:
+            heartbeat.joined += 1
+            heartbeat.channels += 1
+        self._errors.pop(phone, None)
+        self._next_at[phone] = time.time() + JOIN_INTERVAL
+        await redis.zrem(key, channel)
+        heartbeat.join_pending = max(heartbeat.join_pending - 1, 0)
+
+    @staticmethod
+    async def _request(redis: Redis, catcher: CatcherClient, channel: str) -> None:
+        client = catcher.client
+        # Формат как в monitoring_channels: @username, -100id или хеш приглашения
+        if channel.startswith("@"):
+            cached = await cached_entities(redis, [channel])
+            entity = cached[channel].input_channel if channel in cached else channel
+            await client(JoinChannelRequest(entity))
+        elif channel.lstrip("-").isdigit():
+            await client(JoinChannelRequest(int(channel)))
+        else:
+            try:
+                await client(ImportChatInviteRequest(channel))
+            except UserAlreadyParticipantError:
+                pass
+
+
+join_queue = JoinQueue(runtime)
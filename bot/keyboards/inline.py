@@ -1,6 +1,7 @@
-from typing import Final
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+from typing import TYPE_CHECKING, Final
+
 from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from bot.db.models import Catcher
 from bot.keyboards.factories import (
@@ -12,6 +13,9 @@ from bot.keyboards.factories import (
     InfoFactory,
 )
 
+if TYPE_CHECKING:
+    from bot.catcher_status import CatcherStatusEntry
+
 LIMIT_BUTTONS: Final[int] = 100
 BACK_BUTTON_TEXT = "🔙"
 
@@ -56,7 +60,7 @@ async def ik_profile_without_sub() -> InlineKeyboardMarkup:
 
 
 async def ik_available_catchers(
-    catchers: list[Catcher],
+    catchers: "list[Catcher | CatcherStatusEntry]",
     back_to: str = "default",
 ) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
@@ -0,0 +1,122 @@
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Final
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+# Сколько держать клиента между шагами входа (код, пароль)
+LOGIN_IDLE_TTL: Final[float] = 10 * 60
+EVICT_INTERVAL: Final[float] = 60
+
+
+@dataclasses.dataclass
+class LoginClient:
+    client: TelegramClient
+    api_id: int
+    api_hash: str
+    path: str
+    last_used: float = dataclasses.field(default_factory=time.monotonic)
+
+
+class LoginClientRegistry:
+    """
+    Подключённые клиенты Telethon для входа в аккаунт, по номеру телефона.
+
+    Отправка кода, ввод кода и пароля идут через одно соединение: не нужно
+    заново проходить handshake и открывать файл сессии, а phone_code_hash
+    остаётся привязан к тому же соединению. Клиент закрывается по release
+    или после LOGIN_IDLE_TTL без обращений.
+
+    Клиенты живут в памяти процесса, поэтому шаги входа должны попадать в
+    ту же реплику бота.
+    """
+
+    def __init__(self, idle_ttl: float = LOGIN_IDLE_TTL) -> None:
+        self.idle_ttl = idle_ttl
+        self._clients: dict[str, LoginClient] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._evict_loop())
+
+    async def acquire(
+        self,
+        phone: str,
+        api_id: int,
+        api_hash: str,
+        path: str,
+    ) -> TelegramClient:
+        lock = self._locks.setdefault(phone, asyncio.Lock())
+        async with lock:
+            entry = self._clients.get(phone)
+            if entry is not None and (entry.api_id, entry.api_hash, entry.path) != (
+                api_id,
+                api_hash,
+                path,
+            ):
+                await self._close(phone)
+                entry = None
+
+            if entry is None:
+                client = TelegramClient(path, api_id, api_hash)
+                entry = LoginClient(client, api_id, api_hash, path)
+                self._clients[phone] = entry
+            entry.last_used = time.monotonic()
+
+            if not entry.client.is_connected():
+                try:
+                    await entry.client.connect()
+                except Exception:
+                    await self._close(phone)
+                    raise
+            return entry.client
+
+    async def release(self, phone: str) -> None:
+        """Закрывает клиента: вход завершён или прерван, сессию займёт ловец."""
+        await self._close(phone)
+        self._locks.pop(phone, None)
+
+    async def evict_idle(self) -> int:
+        deadline = time.monotonic() - self.idle_ttl
+        idle = [
+            phone
+            for phone, entry in self._clients.items()
+            if entry.last_used < deadline
+        ]
+        for phone in idle:
+            logger.info("Login client %s idle, closing", phone)
+            await self.release(phone)
+        return len(idle)
+
+    async def close_all(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for phone in list(self._clients):
+            await self.release(phone)
+
+    async def _close(self, phone: str) -> None:
+        entry = self._clients.pop(phone, None)
+        if entry is None:
+            return
+        try:
+            await entry.client.disconnect()
+        except Exception as e:
+            logger.debug(f"Ошибка при отключении клиента: {e}")
+
+    async def _evict_loop(self) -> None:
+        while True:
+            await asyncio.sleep(EVICT_INTERVAL)
+            try:
+                await self.evict_idle()
+            except Exception:
+                logger.exception("Login client eviction failed")
+
+
+login_clients = LoginClientRegistry()
@@ -0,0 +1,155 @@
+import copy
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.middleware import FSMContextMiddleware
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import TelegramObject
+
+from bot.fsm_storage import MsgpackRedisStorage
+from bot.redis_pool import pipeline
+
+
+def _encode_data(storage: RedisStorage, data: dict[str, Any]) -> bytes | str:
+    if isinstance(storage, MsgpackRedisStorage):
+        return storage.encode_data(data)
+    return storage.json_dumps(data)
+
+
+def _decode_data(storage: RedisStorage, value: bytes | str) -> dict[str, Any]:
+    if isinstance(storage, MsgpackRedisStorage):
+        return storage.decode_data(value)
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    return storage.json_loads(value)
+
+
+class CachedFSMContext(FSMContext):
+    """
+    FSMContext, который читает состояние и данные один раз за апдейт и
+    держит их в памяти. Изменения копятся локально и уходят в хранилище
+    одним pipeline в flush.
+    """
+
+    def __init__(self, context: FSMContext) -> None:
+        super().__init__(storage=context.storage, key=context.key)
+        self._state: str | None = None
+        self._data: dict[str, Any] = {}
+        self._state_changed = False
+        self._data_changed = False
+
+    @property
+    def changed(self) -> bool:
+        return self._state_changed or self._data_changed
+
+    async def load(self) -> None:
+        storage = self.storage
+        if not isinstance(storage, RedisStorage):
+            self._state = await storage.get_state(self.key)
+            self._data = await storage.get_data(self.key)
+            return
+
+        # Состояние и данные за один запрос
+        raw_state, raw_data = await storage.redis.mget(
+            [
+                storage.key_builder.build(self.key, "state"),
+                storage.key_builder.build(self.key, "data"),
+            ]
+        )
+        if isinstance(raw_state, bytes):
+            raw_state = raw_state.decode("utf-8")
+        self._state = cast(str | None, raw_state)
+        if raw_data is not None:
+            self._data = _decode_data(storage, raw_data)
+
+    async def flush(self) -> None:
+        if not self.changed:
+            return
+        storage = self.storage
+        if not isinstance(storage, RedisStorage):
+            if self._state_changed:
+                await storage.set_state(self.key, self._state)
+            if self._data_changed:
+                await storage.set_data(self.key, self._data)
+        else:
+            # Та же семантика, что у RedisStorage.set_state/set_data
+            async with pipeline(storage.redis) as pipe:
+                if self._state_changed:
+                    key = storage.key_builder.build(self.key, "state")
+                    if self._state is None:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(key, self._state, ex=storage.state_ttl)
+                if self._data_changed:
+                    key = storage.key_builder.build(self.key, "data")
+                    if not self._data:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(
+                            key,
+                            _encode_data(storage, self._data),
+                            ex=storage.data_ttl,
+                        )
+                await pipe.execute()
+        self._state_changed = self._data_changed = False
+
+    async def set_state(self, state: StateType = None) -> None:
+        self._state = state.state if isinstance(state, State) else state
+        self._state_changed = True
+
+    async def get_state(self) -> str | None:
+        return self._state
+
+    async def set_data(self, data: dict[str, Any]) -> None:
+        self._data = copy.deepcopy(data)
+        self._data_changed = True
+
+    async def get_data(self) -> dict[str, Any]:
+        # Копия, как после json_loads: правки вызывающего не попадают в кэш
+        return copy.deepcopy(self._data)
+
+    async def get_value(self, key: str, default: Any | None = None) -> Any | None:
+        return copy.deepcopy(self._data.get(key, default))
+
+    async def update_data(
+        self, data: dict[str, Any] | None = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        if data:
+            kwargs.update(data)
+        self._data.update(copy.deepcopy(kwargs))
+        self._data_changed = True
+        return copy.deepcopy(self._data)
+
+
+class CachedFSMContextMiddleware(FSMContextMiddleware):
+    """
+    Замена FSMContextMiddleware aiogram: вместо 3–6 обращений к Redis за
+    клик — одно чтение до хендлера и одна запись после, если что-то
+    поменялось.
+    """
+
+    async def __call__(  # pyright: ignore
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        bot: Bot = cast(Bot, data["bot"])
+        context = self.resolve_event_context(bot, data)
+        data["fsm_storage"] = self.storage
+        if not context:
+            return await handler(event, data)
+
+        # Состояние читается под блокировкой, как в FSMContextMiddleware
+        async with self.events_isolation.lock(key=context.key):
+            state = CachedFSMContext(context)
+            await state.load()
+            data.update({"state": state, "raw_state": await state.get_state()})
+            try:
+                return await handler(event, data)
+            finally:
+                await state.flush()
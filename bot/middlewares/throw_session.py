@@ -5,9 +5,13 @@ from aiogram import BaseMiddleware
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.db.base import LazySession
+
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import async_sessionmaker
 
+    from bot.db.base import PoolStats
+
 
 class ThrowDBSessionMiddleware(BaseMiddleware):
     async def __call__(  # pyright: ignore
@@ -17,6 +21,14 @@ class ThrowDBSessionMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Any:
         sessionmaker: async_sessionmaker[AsyncSession] = data["sessionmaker"]
-        async with sessionmaker() as session:
-            data["session"] = session
+        pool_stats: PoolStats | None = data.get("pool_stats")
+
+        session = LazySession(sessionmaker)
+        data["session"] = session
+        try:
             return await handler(event, data)
+        finally:
+            if pool_stats is not None:
+                pool_stats.updates += 1
+                pool_stats.updates_with_db += session.used
+            await session.close()
@@ -27,19 +27,24 @@ class ThrowUserMiddleware(BaseMiddleware):
         if not user:
             return None
 
+        session = data["session"]
         match event.event_type:
             case "message":
                 if user.is_bot is False and user.id != TG_SERVICE_USER_ID:
                     data["user"] = await _get_user_db_model(
-                        session=data["session"],
+                        session=session,
                         user_id=user.id,
                     )
+                    await session.release()
+                    session.forget_usage()
             case "callback_query":
                 if user.is_bot is False and user.id != TG_SERVICE_USER_ID:
                     data["user"] = await _get_user_db_model(
-                        session=data["session"],
+                        session=session,
                         user_id=user.id,
                     )
+                    await session.release()
+                    session.forget_usage()
 
             case _:
                 pass
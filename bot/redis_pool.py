@@ -0,0 +1,38 @@
+from typing import TYPE_CHECKING
+
+from redis._parsers import _AsyncHiredisParser
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.utils import HIREDIS_AVAILABLE
+
+if TYPE_CHECKING:
+    from bot.settings import RedisSettings
+
+
+def create_redis(settings: "RedisSettings", max_connections: int) -> Redis:
+    """
+    Клиент поверх BlockingConnectionPool: при исчерпании пула запрос ждёт
+    свободное соединение до pool_timeout, а не открывает новое.
+    """
+    kwargs = {}
+    if HIREDIS_AVAILABLE:
+        kwargs["parser_class"] = _AsyncHiredisParser
+    pool = BlockingConnectionPool(
+        host=settings.host,
+        port=settings.port,
+        db=int(settings.db),
+        max_connections=max_connections,
+        timeout=settings.pool_timeout,
+        socket_timeout=settings.socket_timeout,
+        socket_connect_timeout=settings.connect_timeout,
+        socket_keepalive=True,
+        health_check_interval=settings.health_check_interval,
+        retry_on_timeout=True,
+        **kwargs,
+    )
+    return Redis(connection_pool=pool)
+
+
+def pipeline(redis: Redis) -> Pipeline:
+    """Несколько команд за один round trip, без MULTI/EXEC."""
+    return redis.pipeline(transaction=False)
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from typing import Final
+
+from redis.asyncio import Redis
+from sqlalchemy import select, update
+from telethon.errors import (
+    FloodWaitError,
+    RPCError,
+    UsernameInvalidError,
+    UsernameNotOccupiedError,
+)
+from telethon.tl.functions.contacts import ResolveUsernameRequest
+from telethon.tl.types import Channel
+
+from bot.catcher_runtime import CatcherClient, CatcherRuntime, runtime
+from bot.db.base import DBRouter
+from bot.db.models import MonitoringChannel
+from bot.entity_cache import (
+    MISS,
+    ChannelEntity,
+    _decoder,
+    _encoder,
+    _username,
+    key_build,
+)
+from bot.redis_pool import pipeline
+from bot.utils.page_cache import PageCache, invalidate_channels
+
+logger = logging.getLogger(__name__)
+
+# Запросов к Telegram за один запуск резолвера
+RESOLVE_BATCH_SIZE: Final[int] = 50
+# Несуществующий username не спрашиваем у Telegram повторно столько секунд
+MISS_TTL: Final[int] = 24 * 60 * 60
+# Пауза между ResolveUsername одного аккаунта: лимит на него жёсткий, и
+# дожидаться FloodWait дороже
+RESOLVE_INTERVAL: Final[float] = 2
+# Пауза аккаунта после сетевой ошибки
+ERROR_BACKOFF: Final[float] = 60
+
+
+class ChannelResolver:
+    """
+    Заполняет channel_id, access_hash и title каналов через клиентов
+    запущенных ловцов, по очереди, чтобы FloodWait одного аккаунта не
+    останавливал остальных.
+    """
+
+    def __init__(self, runtime: CatcherRuntime) -> None:
+        self.runtime = runtime
+        # Телефон ловца -> monotonic-время, до которого он в FloodWait или
+        # отдыхает после сетевой ошибки
+        self._paused_until: dict[str, float] = {}
+        # Телефон ловца -> monotonic-время, раньше которого его не спрашиваем
+        self._ready_at: dict[str, float] = {}
+
+    def _clients(self) -> list[CatcherClient]:
+        now = time.monotonic()
+        return [
+            catcher
+            for catcher in self.runtime.running()
+            if self._paused_until.get(catcher.spec.phone, 0) <= now
+        ]
+
+    async def _resolve(self, username: str) -> ChannelEntity | None:
+        """None — такого канала нет; исключение — спросить не у кого."""
+        while clients := self._clients():
+            # Аккаунт, который освободится раньше всех: так запросы идут по
+            # очереди, и каждый аккаунт спрашивает не чаще RESOLVE_INTERVAL
+            catcher = min(clients, key=lambda c: self._ready_at.get(c.spec.phone, 0))
+            wait = self._ready_at.get(catcher.spec.phone, 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._ready_at[catcher.spec.phone] = time.monotonic() + RESOLVE_INTERVAL
+            try:
+                result = await catcher.client(ResolveUsernameRequest(username))
+            except FloodWaitError as e:
+                logger.warning(
+                    "Catcher %s FloodWait %ss while resolving",
+                    catcher.spec.phone,
+                    e.seconds,
+                )
+                catcher.heartbeat.flood_waits += 1
+                self._paused_until[catcher.spec.phone] = time.monotonic() + e.seconds
+                continue
+            except (UsernameInvalidError, UsernameNotOccupiedError):
+                return None
+            except OSError as e:
+                # ConnectionError и прочие сбои сети: спросим другой аккаунт
+                logger.warning(
+                    "Catcher %s failed to resolve @%s: %r",
+                    catcher.spec.phone,
+                    username,
+                    e,
+                )
+                catcher.heartbeat.errors += 1
+                self._paused_until[catcher.spec.phone] = (
+                    time.monotonic() + ERROR_BACKOFF
+                )
+                continue
+            for chat in result.chats:
+                if isinstance(chat, Channel):
+                    return ChannelEntity(chat.id, chat.access_hash, chat.title)
+            return None
+        raise LookupError("no catcher available for resolving")
+
+    async def resolve_channels(
+        self,
+        db_router: DBRouter,
+        redis: Redis,
+        page_cache: PageCache,
+    ) -> int:
+        async with db_router.background_reader() as session:
+            channels = (
+                await session.execute(
+                    select(MonitoringChannel.id, MonitoringChannel.username)
+                    .where(
+                        MonitoringChannel.channel_id.is_(None),
+                        MonitoringChannel.username.startswith("@"),
+                    )
+                    .order_by(MonitoringChannel.id)
+                )
+            ).all()
+        if not channels:
+            return 0
+
+        names = {channel_id: _username(username) for channel_id, username in channels}
+        raw = await redis.mget([key_build(name) for name in names.values()])
+        cached = dict(zip(names.values(), raw))
+
+        entities: dict[int, ChannelEntity] = {}
+        fresh: dict[str, bytes] = {}
+        misses: list[str] = []
+        requests = 0
+        for channel_id, name in names.items():
+            if (value := cached[name]) is not None:
+                if value != MISS:
+                    entities[channel_id] = _decoder.decode(value)
+                continue
+            if requests >= RESOLVE_BATCH_SIZE:
+                continue
+            requests += 1
+            try:
+                entity = await self._resolve(name)
+            except LookupError:
+                # Ловцов нет или все на паузе — дальше только кэш
+                requests = RESOLVE_BATCH_SIZE
+                continue
+            except (RPCError, ValueError) as e:
+                # Ошибка про этот канал: не кэшируем, повторим в следующий запуск,
+                # а уже найденное ниже всё равно сохранится
+                logger.warning("Failed to resolve @%s: %s", name, e)
+                continue
+            if entity is None:
+                misses.append(name)
+                continue
+            entities[channel_id] = entity
+            fresh[key_build(name)] = _encoder.encode(entity)
+
+        if fresh or misses:
+            async with pipeline(redis) as pipe:
+                if fresh:
+                    pipe.mset(fresh)
+                for name in misses:
+                    pipe.set(key_build(name), MISS, ex=MISS_TTL)
+                await pipe.execute()
+
+        if entities:
+            async with db_router.background() as session:
+                await session.execute(
+                    update(MonitoringChannel),
+                    [
+                        {
+                            "id": channel_id,
+                            "channel_id": entity.id,
+                            "access_hash": entity.access_hash,
+                            "title": entity.title[
+                                : MonitoringChannel.title.type.length
+                            ],
+                        }
+                        for channel_id, entity in entities.items()
+                    ],
+                )
+                await session.commit()
+            await invalidate_channels(page_cache)
+            logger.info("Resolved %s channels", len(entities))
+        return len(entities)
+
+
+resolver = ChannelResolver(runtime)
@@ -1,14 +1,30 @@
 import asyncio
+import bisect
+import dataclasses
 import datetime
 import functools
+import heapq
+import itertools
 import logging
+import math
 import random
 import re
+import time
+import uuid
 import warnings
 from collections.abc import Callable, Hashable
 
+from redis.asyncio import Redis
+
 logger = logging.getLogger("schedule")
 
+# Насколько next_run из хранилища может опережать наш слот, чтобы считать,
+# что этот запуск ещё никто не выполнил (разные моменты перевода monotonic → time)
+SLOT_TOLERANCE = 0.01
+
+# Верхние границы корзин гистограммы длительности запусков, секунды
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
 
 class ScheduleError(Exception):
     """Base schedule exception."""
@@ -26,17 +42,225 @@ class CancelJob:
     """Can be returned from a job to unschedule itself."""
 
 
+@dataclasses.dataclass
+class JobStats:
+    """
+    Счётчики запусков задачи. runs — завершившиеся запуски, включая
+    failures; timeouts в runs не входят. lag — на сколько запуск опоздал
+    к next_run.
+    """
+
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    overruns: int = 0
+    last_duration: float = 0
+    max_duration: float = 0
+    last_lag: float = 0
+    max_lag: float = 0
+    durations: list[int] = dataclasses.field(
+        default_factory=lambda: [0] * len(DURATION_BUCKETS)
+    )
+
+    def observe_duration(self, seconds: float) -> None:
+        self.runs += 1
+        self.last_duration = seconds
+        self.max_duration = max(self.max_duration, seconds)
+        self.durations[bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+
+    def observe_lag(self, seconds: float) -> None:
+        self.last_lag = seconds
+        self.max_lag = max(self.max_lag, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-я доля запусков."""
+        if not self.runs:
+            return 0
+        rank = q * self.runs
+        seen = 0
+        for bound, count in zip(DURATION_BUCKETS, self.durations):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+def _wall_time(deadline: float) -> float:
+    return time.time() + deadline - time.monotonic()
+
+
+class RedisJobStore:
+    """
+    Общее для реплик состояние задач: next_run/last_run (unix time) в хэше
+    и lease-блокировка на время выполнения, чтобы задача шла на одной реплике.
+    """
+
+    RENEW = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    RELEASE = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = "post_manager:scheduler",
+        lease_ms: int = 30_000,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.lease_ms = lease_ms
+        self._renew = redis.register_script(self.RENEW)
+        self._release = redis.register_script(self.RELEASE)
+
+    def _state_key(self, job: "Job") -> str:
+        return f"{self.prefix}:job:{job.id}"
+
+    def _lock_key(self, job: "Job") -> str:
+        return f"{self.prefix}:lock:{job.id}"
+
+    async def load(self, job: "Job") -> tuple[None | float, None | float]:
+        next_run, last_run = await self.redis.hmget(
+            self._state_key(job), "next_run", "last_run"
+        )
+        return (
+            float(next_run) if next_run is not None else None,
+            float(last_run) if last_run is not None else None,
+        )
+
+    async def save(self, job: "Job", **fields: float) -> None:
+        await self.redis.hset(self._state_key(job), mapping=fields)
+
+    async def acquire(self, job: "Job") -> None | str:
+        token = uuid.uuid4().hex
+        if await self.redis.set(self._lock_key(job), token, nx=True, px=self.lease_ms):
+            return token
+        return None
+
+    async def renew(self, job: "Job", token: str) -> bool:
+        return bool(
+            await self._renew(keys=[self._lock_key(job)], args=[token, self.lease_ms])
+        )
+
+    async def release(self, job: "Job", token: str) -> None:
+        await self._release(keys=[self._lock_key(job)], args=[token])
+
+
 class Scheduler:
-    def __init__(self) -> None:
+    """
+    Задачи лежат в куче (deadline, seq, job), deadline — по монотонным часам.
+    Перепланированная или отменённая задача не удаляется из кучи: её старая
+    запись просто перестаёт совпадать с job._heap_seq и отбрасывается при
+    извлечении.
+    """
+
+    def __init__(self, store: None | RedisJobStore = None) -> None:
         self.jobs: list[Job] = []
+        self.store = store
+        self._heap: list[tuple[float, int, Job]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+    def _push(self, job: "Job") -> None:
+        job._heap_seq = next(self._seq)
+        heapq.heappush(self._heap, (job.deadline, job._heap_seq, job))
+        self._wakeup.set()
+
+    def _peek(self) -> "Job | None":
+        while self._heap:
+            _, seq, job = self._heap[0]
+            if seq == job._heap_seq:
+                return job
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self) -> list["Job"]:
+        due = []
+        now = time.monotonic()
+        while (job := self._peek()) is not None and job.deadline <= now:
+            heapq.heappop(self._heap)
+            job._heap_seq = None
+            due.append(job)
+        return due
+
+    def _reschedule(self, job: "Job", catch_up: bool = False) -> None:
+        # Без coalesce следующий запуск считается от пропущенного, и
+        # пропущенные запуски догоняются подряд
+        job._schedule_next_run(catch_up=catch_up and not job._coalesce)
+        if job._is_overdue(job.next_run):
+            self.cancel_job(job)
+        else:
+            self._push(job)
+
+    def _dispatch(self, job: "Job") -> None | asyncio.Task:
+        """Запускает задачу отдельной таской, не дожидаясь её завершения."""
+        lateness = time.monotonic() - job.deadline
+        slot = _wall_time(job.deadline)
+        self._reschedule(job, catch_up=True)
+
+        if job._misfire_grace_time is not None and lateness > job._misfire_grace_time:
+            logger.warning("Job %s misfired by %.3fs, skipping", job, lateness)
+            job.stats.skipped += 1
+            return None
+        if len(job._tasks) >= job._max_instances:
+            logger.warning(
+                "Job %s skipped: %s instance(s) still running", job, len(job._tasks)
+            )
+            job.stats.skipped += 1
+            return None
+        job.stats.observe_lag(max(lateness, 0))
+
+        task = asyncio.create_task(self._run_job(job, slot))
+        job._tasks.add(task)
+        self._tasks.add(task)
+        task.add_done_callback(functools.partial(self._job_done, job))
+        return task
+
+    def _job_done(self, job: "Job", task: asyncio.Task) -> None:
+        job._tasks.discard(task)
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if isinstance(exc, TimeoutError):
+            logger.error("Job %s timed out after %ss", job, job._timeout)
+        elif exc is not None:
+            logger.error("Job %s failed", job, exc_info=exc)
 
     async def run_pending(self, *args, **kwargs):
-        jobs = [asyncio.create_task(job.run()) for job in self.jobs if job.should_run]
+        jobs = [task for job in self._pop_due() if (task := self._dispatch(job))]
         if not jobs:
             return [], []
         done, pending = await asyncio.wait(jobs, *args, **kwargs)
         return done, pending
 
+    async def run_forever(self) -> None:
+        """Спит до ближайшей задачи; добавление и отмена задач будят цикл раньше."""
+        if self.store is not None:
+            await self.restore()
+        while True:
+            self._wakeup.clear()
+            for job in self._pop_due():
+                self._dispatch(job)
+            timeout = self.idle_seconds
+            if timeout is not None and timeout <= 0:
+                # Даём запущенным таскам стартовать перед догоняющими запусками
+                await asyncio.sleep(0)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+
     async def run_all(self, delay_seconds: int = 0, *args, **kwargs):
         if delay_seconds:
             warnings.warn(
@@ -44,7 +268,10 @@ class Scheduler:
                 DeprecationWarning,
                 stacklevel=2,
             )
-        jobs = [asyncio.create_task(self._run_job(job)) for job in self.jobs[:]]
+        jobs = []
+        for job in self.jobs[:]:
+            self._reschedule(job)
+            jobs.append(asyncio.create_task(self._run_job(job)))
         if not jobs:
             return [], []
         done, pending = await asyncio.wait(jobs, *args, **kwargs)
@@ -58,10 +285,16 @@ class Scheduler:
     def clear(self, tag: None | Hashable = None) -> None:
         if tag is None:
             logger.info("Deleting *all* jobs")
+            for job in self.jobs:
+                job._heap_seq = None
             del self.jobs[:]
+            self._heap.clear()
         else:
             logger.info('Deleting all jobs tagged "%s"', tag)
+            for job in self.get_jobs(tag):
+                job._heap_seq = None
             self.jobs[:] = (job for job in self.jobs if tag not in job.tags)
+        self._wakeup.set()
 
     def cancel_job(self, job: "Job") -> None:
         try:
@@ -69,17 +302,117 @@ class Scheduler:
             self.jobs.remove(job)
         except ValueError:
             logger.info('Cancelling not-scheduled job "%s"', str(job))
+        job._heap_seq = None
+        self._wakeup.set()
 
     def every(self, interval: int = 1) -> "Job":
         return Job(interval, self)
 
-    async def _run_job(self, job: "Job") -> None:
-        await job.run()
+    def _add_job(self, job: "Job") -> None:
+        self.jobs.append(job)
+        self._push(job)
 
-    @property
-    def get_next_run(self, tag: None | Hashable = None) -> None | datetime.datetime:
-        if not self.jobs:
+    async def run_once(self, job: "Job"):
+        """
+        Запускает задачу вне расписания, но с той же блокировкой в хранилище:
+        если её сейчас выполняет другая реплика, запуск пропускается.
+        """
+        return await self._run_job(job)
+
+    async def _call_job(self, job: "Job"):
+        started = time.monotonic()
+        timed_out = False
+        try:
+            async with asyncio.timeout(job._timeout):
+                ret = await job.run()
+        except TimeoutError:
+            timed_out = True
+            job.stats.timeouts += 1
+            raise
+        except Exception:
+            job.stats.failures += 1
+            raise
+        finally:
+            duration = time.monotonic() - started
+            # Прерванный по таймауту запуск не завершился: в runs и
+            # гистограмму длительностей он не идёт, только в timeouts
+            if not timed_out:
+                job.stats.observe_duration(duration)
+            if job.period is not None and duration > job.period:
+                job.stats.overruns += 1
+                logger.warning(
+                    "Job %s took %.3fs, longer than its %.3fs interval",
+                    job,
+                    duration,
+                    job.period,
+                )
+        if ret is CancelJob and job in self.jobs:
+            self.cancel_job(job)
+        return ret
+
+    async def _run_job(self, job: "Job", slot: None | float = None):
+        if self.store is None:
+            return await self._call_job(job)
+
+        token = await self.store.acquire(job)
+        if token is None:
+            logger.info("Job %s is running on another replica", job)
+            job.stats.skipped += 1
             return None
+        try:
+            next_run, _ = await self.store.load(job)
+            if (
+                slot is not None
+                and next_run is not None
+                and next_run > slot + SLOT_TOLERANCE
+            ):
+                # Этот слот уже отработала другая реплика — подстраиваемся под неё
+                self._adopt(job, next_run)
+                job.stats.skipped += 1
+                return None
+            await self.store.save(job, next_run=_wall_time(job.deadline))
+
+            keeper = asyncio.create_task(self._keep_lease(job, token))
+            try:
+                ret = await self._call_job(job)
+            finally:
+                keeper.cancel()
+            await self.store.save(job, last_run=time.time())
+            return ret
+        finally:
+            await self.store.release(job, token)
+
+    async def _keep_lease(self, job: "Job", token: str) -> None:
+        while True:
+            await asyncio.sleep(self.store.lease_ms / 3000)
+            if not await self.store.renew(job, token):
+                logger.warning("Job %s lost its lease", job)
+                return
+
+    def _adopt(self, job: "Job", next_run: float) -> None:
+        """Переносит запуск задачи на next_run (unix time) из хранилища."""
+        if job not in self.jobs:
+            return
+        job.deadline = job._nominal = time.monotonic() + next_run - time.time()
+        job.next_run = datetime.datetime.fromtimestamp(next_run)
+        self._push(job)
+
+    async def restore(self) -> None:
+        """Продолжает расписание задач с того места, где его оставил прошлый запуск."""
+        for job in self.jobs[:]:
+            next_run, last_run = await self.store.load(job)
+            if last_run is not None:
+                job.last_run = datetime.datetime.fromtimestamp(last_run)
+            if next_run is not None:
+                self._adopt(job, next_run)
+
+    def metrics(self) -> dict[str, JobStats]:
+        return {job.id: job.stats for job in self.jobs}
+
+    def get_next_run(self, tag: None | Hashable = None) -> None | datetime.datetime:
+        if tag is None:
+            job = self._peek()
+            return job.next_run if job is not None else None
         jobs_filtered = self.get_jobs(tag)
         if not jobs_filtered:
             return None
@@ -87,9 +420,10 @@ class Scheduler:
 
     @property
     def idle_seconds(self) -> None | float:
-        if not self.get_next_run:
+        job = self._peek()
+        if job is None:
             return None
-        return (self.get_next_run - datetime.datetime.now()).total_seconds()
+        return job.deadline - time.monotonic()
 
 
 class Job:
@@ -102,13 +436,28 @@ class Job:
         self.at_time_zone = None
         self.last_run: None | datetime.datetime = None
         self.next_run: None | datetime.datetime = None
+        # Момент запуска по time.monotonic(); next_run хранится для отображения
+        # и для календарных задач с .at()
+        self.deadline: None | float = None
+        self._nominal: None | float = None
+        self._jitter: float = 0
         self.start_day: None | str = None
         self.cancel_after: None | datetime.datetime = None
         self.tags: set = set()
         self.scheduler: None | Scheduler = scheduler
+        self.id: None | str = None
+        self.stats = JobStats()
+        # Интервал в секундах для интервальных задач, для календарных None
+        self.period: None | float = None
+        self._heap_seq: None | int = None
+        self._max_instances: int = 1
+        self._coalesce: bool = True
+        self._misfire_grace_time: None | float = None
+        self._timeout: None | float = None
+        self._tasks: set[asyncio.Task] = set()
 
     def __lt__(self, other):
-        return self.next_run < other.next_run
+        return self.deadline < other.deadline
 
     def __str__(self) -> str:
         if hasattr(self.job_func, "__name__"):
@@ -156,6 +505,16 @@ class Job:
             "timestats": timestats,
         }
 
+    @property
+    def millisecond(self):
+        assert self.interval == 1, "Use milliseconds instead of millisecond"
+        return self.milliseconds
+
+    @property
+    def milliseconds(self):
+        self.unit = "milliseconds"
+        return self
+
     @property
     def second(self):
         assert self.interval == 1, "Use seconds instead of second"
@@ -283,6 +642,35 @@ class Job:
         self.tags.update(tags)
         return self
 
+    def named(self, job_id: str):
+        """Идентификатор задачи в RedisJobStore, по умолчанию имя функции."""
+        self.id = job_id
+        return self
+
+    def max_instances(self, value: int):
+        if value < 1:
+            msg = "max_instances must be at least 1"
+            raise ScheduleValueError(msg)
+        self._max_instances = value
+        return self
+
+    def coalesce(self, value: bool = True):
+        self._coalesce = value
+        return self
+
+    def misfire_grace_time(self, seconds: None | float):
+        self._misfire_grace_time = seconds
+        return self
+
+    def timeout(self, seconds: None | float):
+        self._timeout = seconds
+        return self
+
+    def jitter(self, seconds: float):
+        """Случайная задержка до seconds к каждому запуску интервальной задачи."""
+        self._jitter = seconds
+        return self
+
     def at(self, time_str: str, tz: None | str = None):
         if self.unit not in ("days", "hours", "minutes") and not self.start_day:
             msg = "Invalid unit (valid units are `days`, `hours`, and `minutes`)"
@@ -404,19 +792,20 @@ class Job:
     def do(self, job_func: Callable, *args, **kwargs):
         self.job_func = functools.partial(job_func, *args, **kwargs)
         functools.update_wrapper(self.job_func, job_func)
+        self.id = self.id or job_func.__name__
         self._schedule_next_run()
         if self.scheduler is None:
             msg = "Unable to a add job to schedule. Job is not associated with an scheduler"
             raise ScheduleError(
                 msg
             )
-        self.scheduler.jobs.append(self)
+        self.scheduler._add_job(self)
         return self
 
     @property
     def should_run(self) -> bool:
-        assert self.next_run is not None, "must run _schedule_next_run before"
-        return datetime.datetime.now() >= self.next_run
+        assert self.deadline is not None, "must run _schedule_next_run before"
+        return time.monotonic() >= self.deadline
 
     async def run(self):
         if self._is_overdue(datetime.datetime.now()):
@@ -428,15 +817,18 @@ class Job:
             self.scheduler.cancel_job(self)
             return ret
         self.last_run = datetime.datetime.now()
-        self._schedule_next_run()
-        if self._is_overdue(self.next_run):
-            logger.info("Cancelling job %s", self)
-            return CancelJob
         return ret
 
-    def _schedule_next_run(self) -> None:
-        if self.unit not in ("seconds", "minutes", "hours", "days", "weeks"):
-            msg = "Invalid unit (valid units are `seconds`, `minutes`, `hours`, `days`, and `weeks`)"
+    def _schedule_next_run(self, catch_up: bool = False) -> None:
+        if self.unit not in (
+            "milliseconds",
+            "seconds",
+            "minutes",
+            "hours",
+            "days",
+            "weeks",
+        ):
+            msg = "Invalid unit (valid units are `milliseconds`, `seconds`, `minutes`, `hours`, `days`, and `weeks`)"
             raise ScheduleValueError(
                 msg,
             )
@@ -447,6 +839,21 @@ class Job:
             interval = random.randint(self.interval, self.latest)
         else:
             interval = self.interval
+        if self.at_time is None and self.start_day is None:
+            # Интервальные задачи считаются по монотонным часам, перевод
+            # системного времени их не сдвигает
+            period = datetime.timedelta(**{self.unit: interval}).total_seconds()
+            self.period = period
+            now_monotonic = time.monotonic()
+            base = now_monotonic
+            if catch_up and self._nominal is not None:
+                base = self._nominal
+            self._nominal = base + period
+            self.deadline = self._nominal + random.uniform(0, self._jitter)
+            self.next_run = datetime.datetime.now() + datetime.timedelta(
+                seconds=self.deadline - now_monotonic
+            )
+            return
         now = datetime.datetime.now(self.at_time_zone)
         next_run = now
         if self.start_day is not None:
@@ -468,6 +875,9 @@ class Job:
             next_run = next_run.astimezone()
             next_run = next_run.replace(tzinfo=None)
         self.next_run = next_run
+        self.deadline = self._nominal = (
+            time.monotonic() + (next_run - datetime.datetime.now()).total_seconds()
+        )
 
     def _move_to_at_time(self, moment: datetime.datetime) -> datetime.datetime:
         if self.at_time is None:
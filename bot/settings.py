@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from redis.asyncio import Redis
 from sqlalchemy import URL
 
+from bot.redis_pool import create_redis
+
 load_dotenv()
 
 
@@ -12,6 +14,17 @@ class RedisSettings:
         self.host = os.environ.get("REDIS_HOST", "localhost")
         self.port = int(os.environ.get("REDIS_PORT", 6379))
         self.db = os.environ.get("REDIS_DB", 0)
+        # Пул для бота, планировщика и ловцов; отдельный пул для FSM, чтобы
+        # фоновые задачи не занимали соединения, нужные на каждый клик
+        self.max_connections = int(os.environ.get("REDIS_MAX_CONNECTIONS", 20))
+        self.fsm_max_connections = int(os.environ.get("REDIS_FSM_MAX_CONNECTIONS", 50))
+        # Сколько ждать свободного соединения, когда пул исчерпан
+        self.pool_timeout = float(os.environ.get("REDIS_POOL_TIMEOUT", 5))
+        self.socket_timeout = float(os.environ.get("REDIS_SOCKET_TIMEOUT", 5))
+        self.connect_timeout = float(os.environ.get("REDIS_CONNECT_TIMEOUT", 2))
+        self.health_check_interval = int(
+            os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30)
+        )
 
 
 class DBSettings:
@@ -21,6 +34,18 @@ class DBSettings:
         self.db = os.environ.get(f"{_env_prefix}DB", "database")
         self.username = os.environ.get(f"{_env_prefix}USERNAME", "user")
         self.password = os.environ.get(f"{_env_prefix}PASSWORD", "password")
+        self.pool_size = int(os.environ.get(f"{_env_prefix}POOL_SIZE", 100))
+        self.max_overflow = int(os.environ.get(f"{_env_prefix}MAX_OVERFLOW", 10))
+
+
+class SQLiteSettings:
+    def __init__(self) -> None:
+        self.path = os.environ.get("SQLITE_PATH", "post_manager.db")
+        self.synchronous = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.mmap_size = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+        # Отрицательное значение — размер кэша в KiB, а не в страницах
+        self.cache_size = int(os.environ.get("SQLITE_CACHE_SIZE", -64 * 1024))
+        self.busy_timeout = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
 
 
 class Settings:
@@ -32,29 +57,55 @@ class Settings:
     )
     sep = os.environ.get("SEP", "\n")
 
+    # mysql или sqlite (однонодовый режим без отдельного сервера БД)
+    db_backend = os.environ.get("DB_BACKEND", "mysql")
     db: DBSettings = DBSettings()
+    sqlite: SQLiteSettings = SQLiteSettings()
+    # Реплика для чтения списков и постов, включается заданием MYSQL_REPLICA_HOST
+    db_replica: DBSettings | None = (
+        DBSettings("MYSQL_REPLICA_") if os.environ.get("MYSQL_REPLICA_HOST") else None
+    )
+    # Отдельный небольшой пул к основной БД для фоновых задач планировщика
+    background_pool_size = int(os.environ.get("DB_BACKGROUND_POOL_SIZE", 5))
+    background_max_overflow = int(os.environ.get("DB_BACKGROUND_MAX_OVERFLOW", 2))
+    # Сколько дней хранить посты и на сколько дней вперёд держать партиции posts
+    posts_retention_days = int(os.environ.get("POSTS_RETENTION_DAYS", 7))
+    posts_partitions_ahead = int(os.environ.get("POSTS_PARTITIONS_AHEAD", 3))
+    # Порог размера и времени, по которым ловцы сбрасывают посты в БД
+    posts_flush_size = int(os.environ.get("POSTS_FLUSH_SIZE", 500))
+    posts_flush_interval = float(os.environ.get("POSTS_FLUSH_INTERVAL", 0.5))
+    # process — ловец отдельным процессом через SCRIPT_PATH,
+    # inprocess — клиентом Telethon внутри процесса бота
+    catcher_mode = os.environ.get("CATCHER_MODE", "process")
     redis: RedisSettings = RedisSettings()
 
-    def mysql_dsn(self) -> URL:
+    def mysql_dsn(self, db: DBSettings | None = None) -> URL:
+        db = db or self.db
         return URL.create(
             drivername="mysql+aiomysql",
-            database=self.db.db,
-            username=self.db.username,
-            password=self.db.password,
-            host=self.db.host,
+            database=db.db,
+            username=db.username,
+            password=db.password,
+            host=db.host,
+            port=int(db.port),
         )
 
     def mysql_dsn_string(self) -> str:
-        return URL.create(
-            drivername="mysql+aiomysql",
-            database=self.db.db,
-            username=self.db.username,
-            password=self.db.password,
-            host=self.db.host,
-        ).render_as_string(hide_password=False)
-
-    async def redis_dsn(self) -> Redis:
-        return Redis(host=self.redis.host, port=self.redis.port, db=self.redis.db)
+        return self.mysql_dsn().render_as_string(hide_password=False)
+
+    def sqlite_dsn(self) -> URL:
+        return URL.create(drivername="sqlite+aiosqlite", database=self.sqlite.path)
+
+    def db_dsn(self, db: DBSettings | None = None) -> URL:
+        if self.db_backend == "sqlite":
+            return self.sqlite_dsn()
+        return self.mysql_dsn(db)
+
+    def db_dsn_string(self) -> str:
+        return self.db_dsn().render_as_string(hide_password=False)
+
+    async def redis_dsn(self, max_connections: int | None = None) -> Redis:
+        return create_redis(self.redis, max_connections or self.redis.max_connections)
 
 
 se = Settings()
@@ -0,0 +1,272 @@
+import asyncio
+import dataclasses
+import enum
+import logging
+import os
+import signal
+import subprocess
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Final
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+from bot.db.base import DBRouter
+from bot.db.models import Catcher
+from bot.heartbeat import (
+    HEARTBEAT_INTERVAL,
+    CatcherHeartbeat,
+    delete_heartbeat,
+    write_heartbeat,
+)
+from bot.settings import se
+
+if TYPE_CHECKING:
+    from bot.catcher_runtime import CatcherRuntime
+
+logger = logging.getLogger(__name__)
+
+# Сколько процесс должен прожить после запуска, чтобы считать сессию рабочей
+STARTUP_GRACE: Final[float] = 2
+# Сколько ждать завершения после SIGTERM перед SIGKILL
+STOP_TIMEOUT: Final[float] = 10
+
+
+class CatcherStatus(enum.StrEnum):
+    STARTING = "starting"
+    RUNNING = "running"
+    BACKOFF = "backoff"
+    STOPPED = "stopped"
+
+
+@dataclasses.dataclass
+class CatcherSpec:
+    phone: str
+    path_session: str
+    api_id: int
+    api_hash: str
+
+
+@dataclasses.dataclass
+class CatcherProcess:
+    spec: CatcherSpec
+    status: CatcherStatus = CatcherStatus.STARTING
+    process: asyncio.subprocess.Process | None = None
+    started_at: float = 0
+    restarts: int = 0
+    stopping: bool = False
+    task: asyncio.Task | None = None
+    spawned: asyncio.Event = dataclasses.field(default_factory=asyncio.Event)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+
+StatusListener = Callable[[str, CatcherStatus], Awaitable[None]]
+
+
+class CatcherSupervisor:
+    """
+    Держит процессы ловцов дочерними: следит за ними по handle процесса,
+    перезапускает упавшие с экспоненциальной задержкой и сообщает
+    подписчикам о смене состояния.
+
+    Скрипт запуска должен exec'ать ловца на переднем плане: завершение
+    скрипта считается падением ловца.
+    """
+
+    def __init__(
+        self,
+        script_path: str,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        stable_after: float = 60,
+    ) -> None:
+        self.script_path = script_path
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        # Процесс, проживший столько секунд, сбрасывает задержку перезапуска
+        self.stable_after = stable_after
+        self._procs: dict[str, CatcherProcess] = {}
+        self._listeners: list[StatusListener] = []
+        # Выставляется в stop_all: ловцы останавливаются из-за выключения
+        # бота, а не по команде админа, и is_connected трогать нельзя
+        self.shutting_down = False
+        self.redis: Redis | None = None
+
+    def bind(self, redis: Redis) -> None:
+        """Включает heartbeat'ы запущенных процессов, видимые другим репликам."""
+        self.redis = redis
+
+    def subscribe(self, listener: StatusListener) -> None:
+        self._listeners.append(listener)
+
+    def get(self, phone: str) -> CatcherProcess | None:
+        return self._procs.get(phone)
+
+    def is_running(self, phone: str) -> bool:
+        proc = self._procs.get(phone)
+        return proc is not None and proc.alive
+
+    async def start(self, spec: CatcherSpec) -> int:
+        """Запускает ловца под надзором и возвращает PID, либо -1."""
+        if not os.path.exists(self.script_path):
+            logger.error("Bash script not found: %s", self.script_path)
+            return -1
+
+        if self.is_running(spec.phone):
+            return self._procs[spec.phone].process.pid
+        # Ловец в ожидании перезапуска стартует заново сразу
+        await self.stop(spec.phone)
+
+        proc = CatcherProcess(spec)
+        self._procs[spec.phone] = proc
+        proc.task = asyncio.create_task(self._supervise(proc))
+        await proc.spawned.wait()
+        return proc.process.pid if proc.alive else -1
+
+    async def wait_started(self, phone: str, grace: float = STARTUP_GRACE) -> bool:
+        """Ждёт grace секунд или раннего завершения процесса, что наступит раньше."""
+        proc = self._procs.get(phone)
+        if proc is None or not proc.alive:
+            return False
+        try:
+            await asyncio.wait_for(asyncio.shield(proc.process.wait()), grace)
+        except TimeoutError:
+            return True
+        return False
+
+    async def stop(self, phone: str) -> None:
+        proc = self._procs.pop(phone, None)
+        if proc is None:
+            return
+        proc.stopping = True
+        if proc.alive:
+            pid = proc.process.pid
+            _signal_group(pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(proc.process.wait(), STOP_TIMEOUT)
+            except TimeoutError:
+                logger.warning("Catcher %s ignored SIGTERM, killing", proc.spec.phone)
+                _signal_group(pid, signal.SIGKILL)
+                await proc.process.wait()
+        if proc.task is not None:
+            proc.task.cancel()
+        await self._delete_heartbeat(phone)
+        await self._set_status(proc, CatcherStatus.STOPPED)
+
+    async def stop_all(self) -> None:
+        self.shutting_down = True
+        await asyncio.gather(*(self.stop(phone) for phone in list(self._procs)))
+
+    async def _spawn(self, proc: CatcherProcess) -> None:
+        spec = proc.spec
+        try:
+            proc.process = await asyncio.create_subprocess_exec(
+                self.script_path,
+                spec.path_session,
+                str(spec.api_id),
+                spec.api_hash,
+                spec.phone,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+                # Своя группа процессов, чтобы останавливать скрипт вместе с детьми
+                start_new_session=True,
+            )
+        except OSError:
+            logger.exception("Failed to start catcher %s", spec.phone)
+            proc.process = None
+            return
+        proc.started_at = time.monotonic()
+        logger.info("Catcher %s started with PID %s", spec.phone, proc.process.pid)
+
+    async def _supervise(self, proc: CatcherProcess) -> None:
+        backoff = self.min_backoff
+        while True:
+            await self._spawn(proc)
+            proc.spawned.set()
+            if proc.process is not None:
+                await self._set_status(proc, CatcherStatus.RUNNING)
+                beat = asyncio.create_task(self._heartbeat_loop(proc))
+                try:
+                    code = await proc.process.wait()
+                finally:
+                    beat.cancel()
+                await self._delete_heartbeat(proc.spec.phone)
+                if proc.stopping:
+                    return
+                if time.monotonic() - proc.started_at >= self.stable_after:
+                    backoff = self.min_backoff
+                logger.warning(
+                    "Catcher %s exited with code %s, restarting in %ss",
+                    proc.spec.phone,
+                    code,
+                    backoff,
+                )
+
+            proc.restarts += 1
+            await self._set_status(proc, CatcherStatus.BACKOFF)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _heartbeat_loop(self, proc: CatcherProcess) -> None:
+        if self.redis is None:
+            return
+        heartbeat = CatcherHeartbeat(proc.spec.phone, pid=proc.process.pid)
+        while proc.alive:
+            heartbeat.sent_at = time.time()
+            try:
+                await write_heartbeat(self.redis, heartbeat)
+            except Exception:
+                logger.exception("Failed to write heartbeat of %s", proc.spec.phone)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _delete_heartbeat(self, phone: str) -> None:
+        if self.redis is None:
+            return
+        try:
+            await delete_heartbeat(self.redis, phone)
+        except Exception:
+            logger.exception("Failed to delete heartbeat of %s", phone)
+
+    async def _set_status(self, proc: CatcherProcess, status: CatcherStatus) -> None:
+        if proc.status == status:
+            return
+        proc.status = status
+        for listener in self._listeners:
+            try:
+                await listener(proc.spec.phone, status)
+            except Exception:
+                logger.exception("Catcher status listener failed")
+
+
+def _signal_group(pid: int, sig: signal.Signals) -> None:
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        logger.info("Нет прав на завершение процесса %s", pid)
+
+
+async def start_connected_catchers(
+    db_router: DBRouter,
+    catchers: "CatcherSupervisor | CatcherRuntime",
+) -> None:
+    """Поднимает ловцов, которые были подключены до перезапуска бота."""
+    async with db_router.background_reader() as session:
+        connected = (
+            await session.scalars(select(Catcher).where(Catcher.is_connected.is_(True)))
+        ).all()
+    for catcher in connected:
+        await catchers.start(
+            CatcherSpec(
+                catcher.phone, catcher.path_session, catcher.api_id, catcher.api_hash
+            )
+        )
+
+
+supervisor = CatcherSupervisor(se.script_path)
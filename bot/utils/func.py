@@ -1,20 +1,16 @@
-import asyncio
 import dataclasses
 import datetime
 import logging
 import os
 import re
-import signal
-import subprocess
-from collections.abc import Callable
+from collections.abc import Callable, Hashable, Sequence
 from typing import Any, Final
 
-import psutil
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
-from sqlalchemy import select
+from cachetools import TTLCache
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from telethon import TelegramClient
 from telethon.errors import (
     PhoneCodeExpiredError,
     PhoneCodeInvalidError,
@@ -24,9 +20,13 @@ from telethon.errors import (
 )
 from telethon.errors.rpcerrorlist import FloodWaitError
 
+from bot.catcher_runtime import catchers
+from bot.catcher_status import CatcherStatusEntry
 from bot.db.models import UserDB
 from bot.keyboards.inline import ik_profile, ik_profile_without_sub
+from bot.login_clients import login_clients
 from bot.settings import se
+from bot.supervisor import CatcherSpec
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +88,32 @@ class Function:
         )
         return text
 
+    @staticmethod
+    def catchers_status_text(catchers: list[CatcherStatusEntry]) -> str:
+        lines = ["Ловцы"]
+        now = datetime.datetime.now().timestamp()
+        for c in catchers:
+            if c.pid is not None:
+                uptime = datetime.timedelta(seconds=int(c.uptime))
+                lines.append(
+                    f"{c.phone}: PID {c.pid}, {uptime}, "
+                    f"{c.rss / 1024 / 1024:.0f} MiB, CPU {c.cpu_percent:.0f}%"
+                )
+            if hb := c.heartbeat:
+                last_post = (
+                    f"{int(now - hb.last_post_at)} с назад" if hb.last_post_at else "—"
+                )
+                lines.append(
+                    f"{c.phone} ({hb.host}): каналов {hb.channels}, "
+                    f"последний пост {last_post}, ошибок {hb.errors}"
+                )
+                if hb.join_pending or hb.joined or hb.join_failed:
+                    lines.append(
+                        f"  вступление: в очереди {hb.join_pending}, "
+                        f"вступил {hb.joined}, не удалось {hb.join_failed}"
+                    )
+        return "\n".join(lines)
+
     @staticmethod
     async def return_profile_keyboard(sub_active: bool):
         if sub_active:
@@ -99,62 +125,27 @@ class Function:
         async def start_bot(
             phone: str, path_session: str, api_id: int, api_hash: str
         ) -> int:
-            if not os.path.exists(se.script_path):
-                logger.error("Bash script not found: %s", se.script_path)
-                return -1
-
-            await asyncio.create_subprocess_exec(
-                se.script_path,
-                path_session,
-                str(api_id),
-                api_hash,
-                phone,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                preexec_fn=os.setpgrp,
-                start_new_session=True,
+            pid = await catchers.start(
+                CatcherSpec(phone, path_session, int(api_id), api_hash)
             )
+            if pid == -1:
+                logger.error(f"Bot not started for {phone}")
+            return pid
 
-            # Даём скрипту время создать PID-файл
-            await asyncio.sleep(1)
-
-            path_pid = os.path.join(se.path_to_folder, f"{phone}{TAIL_PID_FILE}")
-            if os.path.exists(path_pid):
-                with open(path_pid) as f:
-                    pid = int(f.read())
-                logger.info(f"Bot started with PID: {pid}")
-                return pid
-            logger.error(f"PID file not created for {phone}")
-            return -1
+        @staticmethod
+        async def wait_started(phone: str) -> bool:
+            """True, если ловец пережил время запуска и не упал со старой сессией."""
+            return await catchers.wait_started(phone)
 
         @staticmethod
         async def bot_run(phone: str) -> bool:
-            path_pid = os.path.join(se.path_to_folder, f"{phone}{TAIL_PID_FILE}")
-            if not os.path.exists(path_pid):
-                return False
-            with open(path_pid) as f:
-                pid = int(f.read())
-            return psutil.pid_exists(pid)
+            return catchers.is_running(phone)
 
         @staticmethod
         async def stop_bot(phone: str, delete_session: bool = False) -> None:
-            path_pid = os.path.join(se.path_to_folder, f"{phone}{TAIL_PID_FILE}")
-            if not os.path.exists(path_pid):
-                logger.info("PID-файл не найден")
-                return
-
-            with open(path_pid) as f:
-                pid = int(f.read())
-
-            try:
-                os.killpg(os.getpgid(pid), signal.SIGTERM)
-                logger.info(f"Отправлен сигнал завершения процессу с PID: {pid}")
-            except ProcessLookupError:
-                logger.info("Процесс не найден")
-            except PermissionError:
-                logger.info("Нет прав на завершение процесса")
+            await catchers.stop(phone)
 
+            # PID-файлы оставались от запусков до супервизора
             files = [f"{phone}{TAIL_PID_FILE}"]
             if delete_session:
                 files.append(f"{phone}.session")
@@ -220,12 +211,12 @@ class Function:
             # Приводим code к строке
             code_str = str(code).strip()
 
-            client = None
+            # Клиент остаётся подключённым, если пользователь ещё может
+            # повторить ввод: неверный код или нужен пароль
+            keep_client = False
             try:
-                # Создаём клиента
-                client = TelegramClient(path, api_id, api_hash)
-
-                await client.connect()
+                # Клиент, которым отправляли код, если он ещё жив
+                client = await login_clients.acquire(phone, api_id, api_hash, path)
                 logger.info(f"Подключение к Telegram для номера {phone}...")
 
                 if await client.is_user_authorized():
@@ -255,6 +246,7 @@ class Function:
 
                 except PhoneCodeInvalidError:
                     logger.warning(f"Неверный код для номера {phone}.")
+                    keep_client = True
                     return Result(success=False, message="invalid_code")
 
                 except PhoneCodeExpiredError:
@@ -263,6 +255,7 @@ class Function:
 
                 except SessionPasswordNeededError:
                     logger.info(f"Требуется пароль 2FA для номера {phone}.")
+                    keep_client = True
                     return Result(success=False, message="password_required")
 
                 except FloodWaitError as e:
@@ -281,12 +274,9 @@ class Function:
                 return Result(success=False, message="critical_error")
 
             finally:
-                # Гарантированное отключение клиента
-                if client:
-                    try:
-                        await client.disconnect()  # pyright: ignore
-                    except Exception as e:
-                        logger.debug(f"Ошибка при отключении клиента: {e}")
+                # После входа файл сессии должен освободиться для ловца
+                if not keep_client:
+                    await login_clients.release(phone)
 
         @staticmethod
         async def send_code_via_telethon(
@@ -321,12 +311,10 @@ class Function:
                 logger.warning(f"Некорректный путь к сессии: {path}")
                 return Result(success=False, message="Некорректный путь к сессии")
 
-            client = None
+            # При успехе соединение остаётся для ввода кода
+            keep_client = False
             try:
-                # Создаём клиент
-                client = TelegramClient(path, api_id, api_hash)
-
-                await client.connect()
+                client = await login_clients.acquire(phone, api_id, api_hash, path)
                 logger.info(f"Подключение к Telegram для отправки кода на {phone}...")
 
                 # Проверяем, не авторизован ли уже пользователь
@@ -341,6 +329,7 @@ class Function:
                 )
 
                 phone_code_hash = result.phone_code_hash
+                keep_client = True
                 logger.info(
                     f"Код подтверждения успешно отправлен на {phone}. Hash: {phone_code_hash[:8]}..."
                 )
@@ -377,12 +366,8 @@ class Function:
                 )
 
             finally:
-                # Гарантированное отключение
-                if client:
-                    try:
-                        await client.disconnect()  # pyright: ignore
-                    except Exception as e:
-                        logger.debug(f"Ошибка при отключении клиента: {e}")
+                if not keep_client:
+                    await login_clients.release(phone)
 
     class Url:
         @staticmethod
@@ -477,37 +462,57 @@ class Function:
 
 
 class Chunker:
-    async def _get_chunk_recursive(
+    """
+    Постраничная выборка из БД: LIMIT/OFFSET или keyset по id соседней страницы.
+
+    COUNT(*) кэшируется в памяти процесса по count_key. Для списков из
+    PageCache в ключе версия списка, так что изменение на другой реплике
+    даёт новый ключ, а не устаревшее количество.
+    """
+
+    chunk_size: Final[int] = 10
+    _counts: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+    @classmethod
+    def invalidate(cls, count_key: Hashable) -> None:
+        cls._counts.pop(count_key, None)
+
+    async def _count(
         self,
         model_db: Any,
         session: AsyncSession,
-        ind_chunk: int | None,
-        fetched_data: list[Any] | None = None,
-    ):
-        if fetched_data is None:
-            data = (await session.scalars(select(model_db))).all()
-        else:
-            data = fetched_data
-
-        quantity_chunks = self._count_chunks(len(data))  # всего страниц
-        ind_chunk = ind_chunk or quantity_chunks or 1  # текущая страница
-        chunk: list[Any] = await self._get_chunk(  # данные о каналах
-            list(data),
-            ind_chunk=ind_chunk,
-        )
-
-        if not chunk and ind_chunk > 1:
-            return await self._get_chunk_recursive(
-                model_db,
-                session,
-                ind_chunk - 1,
-                list(data),
+        where: Sequence[Any],
+        count_key: Hashable,
+    ) -> int:
+        count = self._counts.get(count_key)
+        if count is None:
+            count = await session.scalar(
+                select(func.count()).select_from(model_db).where(*where)
             )
+            self._counts[count_key] = count
+        return count
 
-        self.ind_chunk = ind_chunk
-        self.chunk = chunk
-        self.quantity_chunks = quantity_chunks
-
+    async def _get_chunk(
+        self,
+        model_db: Any,
+        session: AsyncSession,
+        where: Sequence[Any],
+        ind_chunk: int,
+        anchor: tuple[str, int] | None,
+    ) -> list[Any]:
+        stmt = select(model_db).where(*where).limit(self.chunk_size)
+        match anchor:
+            case ("after", last_id):
+                stmt = stmt.where(model_db.id > last_id).order_by(model_db.id)
+            case ("before", first_id):
+                stmt = stmt.where(model_db.id < first_id).order_by(model_db.id.desc())
+            case _:
+                stmt = stmt.order_by(model_db.id).offset(
+                    (ind_chunk - 1) * self.chunk_size
+                )
+        chunk = list((await session.scalars(stmt)).all())
+        if anchor and anchor[0] == "before":
+            chunk.reverse()
         return chunk
 
     @staticmethod
@@ -515,14 +520,6 @@ class Chunker:
         remains = len_data % chunk_size
         return len_data // chunk_size + (1 if remains else 0)
 
-    @staticmethod
-    async def _get_chunk(
-        data: list[Any],
-        ind_chunk: int,
-        chunk_size: int = 10,
-    ) -> list[Any]:
-        return data[(ind_chunk - 1) * chunk_size : ind_chunk * chunk_size]
-
     async def __call__(
         self,
         model_db: Any,
@@ -530,19 +527,64 @@ class Chunker:
         ind_chunk: int | None,
         func_to_str: Callable,
         if_none_result: str,
-        fetched_data: list[Any] | None = None,
+        where: Sequence[Any] = (),
+        count_key: Hashable | None = None,
+        anchor: tuple[str, int] | None = None,
     ) -> Any:
-        chunk = await self._get_chunk_recursive(
-            model_db=model_db,
-            session=session,
-            ind_chunk=ind_chunk,
-            fetched_data=fetched_data,
-        )
+        """
+        :param where: условия выборки (например, Trigger.user_id == user.id)
+        :param count_key: ключ кэша количества записей, по умолчанию имя таблицы
+        :param anchor: ("after", id) / ("before", id) — граница соседней страницы,
+            чтобы взять её по индексу вместо OFFSET
+        """
+        count_key = count_key or model_db.__tablename__
+        count = await self._count(model_db, session, where, count_key)
+
+        quantity_chunks = self._count_chunks(count, self.chunk_size)  # всего страниц
+        ind_chunk = min(ind_chunk or quantity_chunks or 1, quantity_chunks or 1)
+        chunk = await self._get_chunk(model_db, session, where, ind_chunk, anchor)
+
+        if (len(chunk) < self.chunk_size and ind_chunk < quantity_chunks) or (
+            not chunk and ind_chunk > 1
+        ):
+            # Список изменился мимо кэша или якорь устарел — пересчитываем один раз
+            self.invalidate(count_key)
+            count = await self._count(model_db, session, where, count_key)
+            quantity_chunks = self._count_chunks(count, self.chunk_size)
+            ind_chunk = min(ind_chunk, quantity_chunks or 1)
+            chunk = await self._get_chunk(model_db, session, where, ind_chunk, None)
+
+        self.ind_chunk = ind_chunk
+        self.chunk = chunk
+        self.quantity_chunks = quantity_chunks
 
-        start_numerate = (self.ind_chunk - 1) * 10
+        start_numerate = (self.ind_chunk - 1) * self.chunk_size
         text = await func_to_str(chunk, start_numerate)
 
         if text is None:
             return if_none_result
 
         return text
+
+    @property
+    def bounds(self) -> list[int]:
+        """id первой и последней записи страницы — якоря для соседних страниц."""
+        if not self.chunk:
+            return []
+        return [self.chunk[0].id, self.chunk[-1].id]
+
+    @staticmethod
+    def anchor_for(
+        arrow: str,
+        ind_chunk: int,
+        quantity_chunks: int,
+        bounds: list[int] | None,
+    ) -> tuple[str, int] | None:
+        """Якорь keyset для перехода стрелкой; при переходе по кругу — None."""
+        if not bounds:
+            return None
+        if arrow == "right" and ind_chunk < quantity_chunks:
+            return ("after", bounds[1])
+        if arrow == "left" and ind_chunk > 1:
+            return ("before", bounds[0])
+        return None
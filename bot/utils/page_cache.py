@@ -0,0 +1,125 @@
+import dataclasses
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Final
+
+import msgspec
+from aiogram.types import InlineKeyboardMarkup
+from cachetools import TTLCache
+from redis.asyncio import Redis
+
+from bot.keyboards.inline import ik_add_or_delete, ik_num_matrix
+from bot.redis_pool import pipeline
+from bot.utils.func import Chunker
+
+logger = logging.getLogger(__name__)
+
+PAGE_TTL: Final[int] = 600
+# Ключ общего списка каналов; нужен и хендлерам, и фоновому резолверу
+CHANNELS_KEY: Final[str] = "channels"
+# Сколько после изменения списка страницы рендерятся с мастера: реплика
+# может ещё отдавать старые строки, а страница закэшируется под новой версией
+REPLICA_LAG: Final[int] = 30
+
+
+def key_build(key: str) -> str:
+    return f"post_manager:page_cache:{key}"
+
+
+@dataclasses.dataclass
+class Page:
+    """Отрисованная страница списка и всё, что хендлеру нужно положить в state."""
+
+    text: str
+    markup: InlineKeyboardMarkup
+    ind_chunk: int
+    quantity_chunks: int
+    bounds: list[int]
+    ids: list[int]
+
+    @classmethod
+    async def from_chunk(cls, ch: Chunker, text: str, view: str) -> "Page":
+        ids = [obj.id for obj in ch.chunk]
+        if view == "delete":
+            start_ind = (ch.ind_chunk - 1) * ch.chunk_size
+            markup = await ik_num_matrix(ids, start_ind, "info")
+        else:
+            markup = await ik_add_or_delete(ch.ind_chunk, ch.quantity_chunks)
+        return cls(text, markup, ch.ind_chunk, ch.quantity_chunks, ch.bounds, ids)
+
+    def dumps(self) -> bytes:
+        data: dict[str, Any] = dataclasses.asdict(self)
+        data["markup"] = self.markup.model_dump(mode="json", exclude_none=True)
+        return msgspec.json.encode(data)
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "Page":
+        data = msgspec.json.decode(raw)
+        data["markup"] = InlineKeyboardMarkup.model_validate(data["markup"])
+        return cls(**data)
+
+
+class PageCache:
+    """
+    Кэш страниц списков по (список, владелец, вид, страница, версия списка).
+
+    Сначала смотрим в память процесса, затем в Redis. Версия списка хранится
+    в Redis и увеличивается при добавлении/удалении, поэтому сброс виден
+    всем репликам бота.
+    """
+
+    def __init__(self, redis: Redis, maxsize: int = 10_000) -> None:
+        self.redis = redis
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=PAGE_TTL)
+
+    @staticmethod
+    def _version_key(kind: str, owner: int) -> str:
+        return key_build(f"version:{kind}:{owner}")
+
+    @staticmethod
+    def _fresh_key(kind: str, owner: int) -> str:
+        return key_build(f"fresh:{kind}:{owner}")
+
+    async def get_or_render(
+        self,
+        kind: str,
+        owner: int,
+        view: str,
+        ind_chunk: int | None,
+        render: Callable[[Hashable, bool], Awaitable[Page]],
+    ) -> Page:
+        """
+        render получает ключ кэша количества записей для Chunker и флаг
+        primary. В ключе версия списка: после изменения на любой реплике
+        старый COUNT(*) из памяти процесса не подхватится. primary — список
+        только что изменился, читать нужно с мастера, а не с реплики.
+        """
+        raw_version, fresh = await self.redis.mget(
+            [self._version_key(kind, owner), self._fresh_key(kind, owner)]
+        )
+        version = int(raw_version or 0)
+        key = f"{kind}:{owner}:{view}:{ind_chunk or 0}:{version}"
+
+        if page := self._local.get(key):
+            return page
+
+        if raw := await self.redis.get(key_build(key)):
+            page = Page.loads(raw)
+        else:
+            page = await render((kind, owner, version), fresh is not None)
+            await self.redis.set(key_build(key), page.dumps(), ex=PAGE_TTL)
+
+        self._local[key] = page
+        return page
+
+    async def invalidate(self, kind: str, owner: int) -> None:
+        # Новая версия — новые ключи и страниц, и количества записей
+        async with pipeline(self.redis) as pipe:
+            pipe.incr(self._version_key(kind, owner))
+            pipe.set(self._fresh_key(kind, owner), 1, ex=REPLICA_LAG)
+            await pipe.execute()
+
+
+async def invalidate_channels(page_cache: PageCache) -> None:
+    """Сбрасывает страницы списка каналов: из хендлеров и из резолвера."""
+    await page_cache.invalidate(CHANNELS_KEY, 0)
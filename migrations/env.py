@@ -27,7 +27,7 @@ target_metadata = Base.metadata
 st = Settings()
 
 
-config.set_main_option("sqlalchemy.url", st.mysql_dsn_string())
+config.set_main_option("sqlalchemy.url", st.db_dsn_string())
 
 
 def run_migrations_offline() -> None:
@@ -48,6 +48,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -55,7 +56,12 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # SQLite не умеет большинство ALTER TABLE, alembic пересоздаёт таблицу целиком
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
 
     with context.begin_transaction():
         context.run_migrations()
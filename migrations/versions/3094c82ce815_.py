@@ -0,0 +1,54 @@
+"""
+
+Revision ID: 3094c82ce815
+Revises: f6f07b2bbfcb
+Create Date: 2026-10-19 13:02:17.604215
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3094c82ce815'
+down_revision = 'f6f07b2bbfcb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # SQLite не умеет ADD COLUMN с DEFAULT CURRENT_TIMESTAMP, поэтому там
+    # таблица пересоздаётся
+    recreate = 'always' if bind.dialect.name == 'sqlite' else 'auto'
+    with op.batch_alter_table('posts', recreate=recreate) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+        batch_op.create_index('ix_posts_created_at', ['created_at'], unique=False)
+
+    if bind.dialect.name != 'mysql':
+        return
+
+    # Ключ партиционирования обязан входить в каждый уникальный ключ таблицы.
+    # Существующие строки получили created_at = сейчас и попадут в сегодняшнюю
+    # партицию, следующие дни создаёт bot.db.partitions.maintain_posts_partitions
+    today = bind.execute(sa.text('SELECT CURDATE()')).scalar_one()
+    tomorrow = today + datetime.timedelta(days=1)
+    op.execute('ALTER TABLE posts DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)')
+    op.execute(
+        'ALTER TABLE posts PARTITION BY RANGE (TO_DAYS(created_at)) ('
+        f"PARTITION p{today:%Y%m%d} VALUES LESS THAN (TO_DAYS('{tomorrow}')), "
+        'PARTITION pmax VALUES LESS THAN MAXVALUE)'
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        op.execute('ALTER TABLE posts REMOVE PARTITIONING')
+        op.execute('ALTER TABLE posts DROP PRIMARY KEY, ADD PRIMARY KEY (id)')
+
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_index('ix_posts_created_at')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,42 @@
+"""
+
+Revision ID: 8c1d2e4f5a6b
+Revises: 3094c82ce815
+Create Date: 2026-10-19 15:40:12.381904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d2e4f5a6b'
+down_revision = '3094c82ce815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # created_at входит в ключ: в партиционированной MySQL-таблице каждый
+    # уникальный ключ обязан содержать ключ партиционирования. Ловцы пишут в
+    # created_at дату сообщения, поэтому повтор того же поста даёт тот же ключ.
+    # created_at всегда по часам БД (как NOW() по умолчанию, партиции и срок
+    # хранения): встроенные ловцы переводят дату сообщения из UTC в часы БД
+    op.execute(
+        sa.text(
+            "DELETE FROM posts WHERE id NOT IN ("
+            "SELECT id FROM (SELECT MIN(id) AS id FROM posts "
+            "GROUP BY channel_username, message_id, created_at) AS keep"
+            ")"
+        )
+    )
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_posts_channel_username_message_id',
+            ['channel_username', 'message_id', 'created_at'],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_constraint('uq_posts_channel_username_message_id', type_='unique')
@@ -0,0 +1,40 @@
+"""
+
+Revision ID: b7e3f91a2c40
+Revises: 8c1d2e4f5a6b
+Create Date: 2026-10-19 16:58:03.114527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f91a2c40'
+down_revision = '8c1d2e4f5a6b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('catchers') as batch_op:
+        batch_op.add_column(sa.Column('capacity', sa.Integer(), server_default='100', nullable=False))
+
+    op.create_table(
+        'channel_assignments',
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('catcher_id', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.ForeignKeyConstraint(['catcher_id'], ['catchers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['channel_id'], ['monitoring_channels.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('channel_id', name='uq_channel_assignments_channel_id'),
+    )
+    op.create_index('ix_channel_assignments_catcher_id', 'channel_assignments', ['catcher_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_channel_assignments_catcher_id', table_name='channel_assignments')
+    op.drop_table('channel_assignments')
+    with op.batch_alter_table('catchers') as batch_op:
+        batch_op.drop_column('capacity')
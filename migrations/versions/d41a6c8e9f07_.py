@@ -0,0 +1,26 @@
+"""
+
+Revision ID: d41a6c8e9f07
+Revises: b7e3f91a2c40
+Create Date: 2026-10-19 18:21:47.950336
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a6c8e9f07'
+down_revision = 'b7e3f91a2c40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('monitoring_channels') as batch_op:
+        batch_op.add_column(sa.Column('access_hash', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('monitoring_channels') as batch_op:
+        batch_op.drop_column('access_hash')
@@ -0,0 +1,50 @@
+"""
+
+Revision ID: f6f07b2bbfcb
+Revises: cff08f36052b
+Create Date: 2026-10-19 12:10:41.318022
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6f07b2bbfcb'
+down_revision = 'cff08f36052b'
+branch_labels = None
+depends_on = None
+
+
+def _delete_duplicates(table: str, columns: str) -> None:
+    # Оставляем самую раннюю запись; подзапрос обёрнут в derived table,
+    # иначе MySQL не даёт удалять из таблицы, которую читает подзапрос
+    op.execute(
+        sa.text(
+            f"DELETE FROM {table} WHERE id NOT IN ("
+            f"SELECT id FROM (SELECT MIN(id) AS id FROM {table} GROUP BY {columns}) AS keep"
+            ")"
+        )
+    )
+
+
+def upgrade() -> None:
+    _delete_duplicates("monitoring_channels", "username")
+    _delete_duplicates("triggers", "user_id, content")
+    _delete_duplicates("ignores", "user_id, content")
+
+    with op.batch_alter_table('monitoring_channels') as batch_op:
+        batch_op.create_unique_constraint('uq_monitoring_channels_username', ['username'])
+    with op.batch_alter_table('triggers') as batch_op:
+        batch_op.create_unique_constraint('uq_triggers_user_id_content', ['user_id', 'content'])
+    with op.batch_alter_table('ignores') as batch_op:
+        batch_op.create_unique_constraint('uq_ignores_user_id_content', ['user_id', 'content'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('ignores') as batch_op:
+        batch_op.drop_constraint('uq_ignores_user_id_content', type_='unique')
+    with op.batch_alter_table('triggers') as batch_op:
+        batch_op.drop_constraint('uq_triggers_user_id_content', type_='unique')
+    with op.batch_alter_table('monitoring_channels') as batch_op:
+        batch_op.drop_constraint('uq_monitoring_channels_username', type_='unique')